@@ -1,11 +1,24 @@
 import os
-import whisper
+import mmap
+import queue
+import atexit
+import functools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter.filedialog import askdirectory
+import numpy as np
+import ctranslate2
+from faster_whisper import WhisperModel, decode_audio
+from model_server import ModelClient
 from docx import Document
-from fpdf import FPDF
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
 from datetime import datetime
 import urllib.request
 from PIL import Image, ImageTk
@@ -16,25 +29,56 @@ LOG_SUCCESS = "log_success.txt"
 LOG_ERROR = "log_error.txt"
 PROCESSED_LIST = "processed_files.txt"
 SUPPORTED_EXT = [".mp3", ".wav", ".m4a", ".flac", ".aac", ".ogg"]
+_EXT_SET = frozenset(SUPPORTED_EXT)
 ASSET_FOLDER = "../asset"
 LOGO_URL = "https://raw.githubusercontent.com/nghiencuuthuoc/PharmApp/refs/heads/master/images/nct_logo_3000x3000_20250606.png"
 LOGO_FILE = os.path.join(ASSET_FOLDER, "nct_logo.png")
 
-# === Ensure asset folder ===
-os.makedirs(ASSET_FOLDER, exist_ok=True)
-
-# === Try downloading logo ===
+# === Try downloading logo (called from start_gui, not at import) ===
 def download_logo():
     try:
+        os.makedirs(ASSET_FOLDER, exist_ok=True)
         urllib.request.urlretrieve(LOGO_URL, LOGO_FILE)
         return True
     except:
         return False
 
-has_logo = download_logo()
+# === Whisper model (CTranslate2: FP16 on GPU, INT8 on CPU) ===
+# CPU: INT8 weights (dynamic quantization), with BF16 activations when the CPU
+# supports them natively; plain FP32 only if this CPU build has no INT8 kernels
+def pick_cpu_compute_type():
+    supported = ctranslate2.get_supported_compute_types("cpu")
+    for compute_type in ("int8_bfloat16", "int8"):
+        if compute_type in supported:
+            return compute_type
+    return "float32"
+
+def load_asr_model(model_name):
+    has_cuda = ctranslate2.get_cuda_device_count() > 0
+    return WhisperModel(
+        model_name,
+        device="cuda" if has_cuda else "cpu",
+        compute_type="float16" if has_cuda else pick_cpu_compute_type(),
+        cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+        num_workers=1,
+    )
+
+# Loaded on first use, so importing this module stays cheap
+@functools.lru_cache(maxsize=1)
+def get_model():
+    return load_asr_model("medium")
 
-# === Whisper model ===
-model = whisper.load_model("medium")
+# === Setup PDF font once (fallback to built-in Helvetica) ===
+PDF_FONT = "Arial"
+try:
+    if "Arial" not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont("Arial", "arial.ttf"))
+except Exception:
+    PDF_FONT = "Helvetica"
+
+# Built once: getSampleStyleSheet() recreates every named style on each call
+_STYLES = getSampleStyleSheet()
+_STYLES.add(ParagraphStyle(name='Justify', alignment=4, fontName=PDF_FONT, fontSize=12, leading=18))
 
 # === Utilities ===
 def save_txt(text, path):
@@ -47,53 +91,166 @@ def save_docx(text, path):
     doc.save(path)
 
 def save_pdf(text, path):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.add_font("Arial", "", fname="arial.ttf", uni=True)  # You need Arial.ttf
-    pdf.set_font("Arial", size=12)
-    for line in text.splitlines():
-        pdf.multi_cell(0, 10, line)
-    pdf.output(path)
+    doc = SimpleDocTemplate(path, pagesize=A4,
+                            rightMargin=30, leftMargin=30,
+                            topMargin=30, bottomMargin=18)
+    story = []
+    for paragraph in text.strip().split("\n\n"):
+        story.append(Paragraph(paragraph.strip().replace("\n", " "), _STYLES['Justify']))
+        story.append(Spacer(1, 10 * mm))
+    doc.build(story)
+
+# path -> fd opened with O_APPEND: every os.write() lands whole at the end of the
+# file, even when another process (GUI + CUDA script) appends to the same log
+_fds = {}
+atexit.register(lambda: [os.close(fd) for fd in _fds.values()])
+
+def _log_fd(path):
+    fd = _fds.get(path)
+    if fd is None:
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = _fds[path] = os.open(path, flags, 0o644)
+    return fd
 
 def log_write(file, message):
-    with open(file, "a", encoding="utf-8") as f:
-        f.write(message + "\n")
+    os.write(_log_fd(file), (message + "\n").encode("utf-8"))
 
 def load_processed():
-    if os.path.exists(PROCESSED_LIST):
-        with open(PROCESSED_LIST, "r", encoding="utf-8") as f:
-            return set(f.read().splitlines())
-    return set()
+    """Processed paths as UTF-8 bytes, split straight from a read-only mmap (no str copy)."""
+    if not os.path.exists(PROCESSED_LIST) or os.path.getsize(PROCESSED_LIST) == 0:
+        return set()  # mmap cannot map an empty file
+    with open(PROCESSED_LIST, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return set(mm[:].splitlines())
+
+def iter_audio_files(root):
+    """
+    Yield (dirpath, filename, names) for supported audio files under root.
+    `names` is the set of file names in dirpath, read once by os.scandir, so
+    checking for sibling outputs needs no further stat() calls.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in _EXT_SET and entry.is_file():
+                yield current, entry.name, names
+        stack.extend(reversed(subdirs))
+
+def already_done(base, names=None):
+    """True when base.txt, base.docx and base.pdf all exist (.txt first: the usual miss)."""
+    if names is not None:
+        name = os.path.basename(base)
+        return name + ".txt" in names and name + ".docx" in names and name + ".pdf" in names
+    return os.path.exists(base + ".txt") and os.path.exists(base + ".docx") and os.path.exists(base + ".pdf")
+
+def pcm_cache_path(path):
+    dirpath, file = os.path.split(path)
+    return os.path.join(dirpath, "." + os.path.splitext(file)[0] + ".pcm.npz")
+
+def load_audio_cached(path):
+    """
+    Decoded 16 kHz audio for `path`, cached as float16 in a hidden .npz next to it
+    (opt-in: "Keep decoded audio cache" in the window, about 115 MB per hour of audio).
+    The cache is keyed by file size + mtime, so an edited file is decoded again.
+    """
+    st = os.stat(path)
+    key = f"{st.st_size}-{st.st_mtime_ns}"
+    cache_path = pcm_cache_path(path)
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached["key"]) == key:
+                    return cached["audio"].astype(np.float32)
+        except Exception:
+            pass  # unreadable cache: decode again
+    audio = decode_audio(path, sampling_rate=16000)
+    try:
+        np.savez(cache_path, key=np.array(key), audio=audio.astype(np.float16))
+    except OSError:
+        pass  # read-only folder, disk full...: the cache is optional
+    return audio
+
+def walk_audio_files(folder, q, processed):
+    """Producer: enqueue (dirpath, file) for audio still to do, then a None sentinel."""
+    try:
+        for dirpath, file, names in iter_audio_files(folder):
+            full_path = os.path.join(dirpath, file)
+            if full_path.encode("utf-8") in processed or already_done(os.path.splitext(full_path)[0], names):
+                continue
+            q.put((dirpath, file))
+    finally:
+        q.put(None)
 
-def transcribe_folder(folder, progress_label):
+def transcribe_folder(folder, progress_label, pcm_cache=False):
     processed = load_processed()
     count = 0
-    for dirpath, _, filenames in os.walk(folder):
-        for file in filenames:
-            if not any(file.lower().endswith(ext) for ext in SUPPORTED_EXT):
+    # TXT/DOCX/PDF are written on worker threads while the next file is transcribed
+    writer = ThreadPoolExecutor(max_workers=4)
+    pending = []
+
+    def drain(wait=False):
+        nonlocal count
+        still_pending = []
+        for full_path, futures in pending:
+            if not wait and not all(f.done() for f in futures):
+                still_pending.append((full_path, futures))
                 continue
-            full_path = os.path.join(dirpath, file)
-            base_name = os.path.splitext(file)[0]
-            if full_path in processed:
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            if errors:
+                log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(errors[0])}")
                 continue
-            try:
-                progress_label["text"] = f"Processing: {file}"
-                result = model.transcribe(full_path, language="vi")
-                text = result["text"].strip()
-
-                txt_path = os.path.join(dirpath, base_name + ".txt")
-                docx_path = os.path.join(dirpath, base_name + ".docx")
-                pdf_path = os.path.join(dirpath, base_name + ".pdf")
-
-                save_txt(text, txt_path)
-                save_docx(text, docx_path)
-                save_pdf(text, pdf_path)
-
-                log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path}")
-                log_write(PROCESSED_LIST, full_path)
-                count += 1
-            except Exception as e:
-                log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(e)}")
+            log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path}")
+            log_write(PROCESSED_LIST, full_path)
+            count += 1
+        pending[:] = still_pending
+
+    # Use a warm model_server.py if one is running; otherwise the in-process model
+    client = ModelClient.connect()
+    model = get_model() if client is None else None
+
+    # The walk runs on its own thread so transcription starts with the first file found
+    q = queue.Queue(maxsize=64)
+    threading.Thread(target=walk_audio_files, args=(folder, q, processed), daemon=True).start()
+
+    while (item := q.get()) is not None:
+        dirpath, file = item
+        full_path = os.path.join(dirpath, file)
+        base_name = os.path.splitext(file)[0]
+        try:
+            progress_label["text"] = f"Processing: {file}"
+            if client is not None:
+                text = client.transcribe(full_path, language="vi", model="medium")
+            else:
+                audio = load_audio_cached(full_path) if pcm_cache else decode_audio(full_path, sampling_rate=16000)
+                segments, _ = model.transcribe(audio, language="vi", beam_size=1,
+                                               vad_filter=True, condition_on_previous_text=False)
+                text = " ".join(s.text.strip() for s in segments).strip()
+
+            txt_path = os.path.join(dirpath, base_name + ".txt")
+            docx_path = os.path.join(dirpath, base_name + ".docx")
+            pdf_path = os.path.join(dirpath, base_name + ".pdf")
+
+            pending.append((full_path, [
+                writer.submit(save_txt, text, txt_path),
+                writer.submit(save_docx, text, docx_path),
+                writer.submit(save_pdf, text, pdf_path),
+            ]))
+        except Exception as e:
+            log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(e)}")
+        drain()
+    drain(wait=True)
+    writer.shutdown(wait=True)
+    if client is not None:
+        client.close()
     progress_label["text"] = f"✅ Done. {count} files processed."
 
 # === GUI ===
@@ -108,7 +265,10 @@ def start_gui():
         if not os.path.isdir(folder):
             messagebox.showerror("Error", "Please select a valid folder.")
             return
-        threading.Thread(target=transcribe_folder, args=(folder, progress_label), daemon=True).start()
+        threading.Thread(target=transcribe_folder, args=(folder, progress_label, pcm_cache_var.get()),
+                         daemon=True).start()
+
+    has_logo = download_logo()
 
     root = tk.Tk()
     root.title("🧠 PharmApp - Audio to Text")
@@ -136,6 +296,11 @@ def start_gui():
     browse_btn = ttk.Button(frame, text="Browse", command=browse_folder)
     browse_btn.pack(side=tk.LEFT)
 
+    pcm_cache_var = tk.BooleanVar(value=False)
+    pcm_cache_check = ttk.Checkbutton(root, text="Keep decoded audio cache (.pcm.npz) for faster re-runs",
+                                      variable=pcm_cache_var)
+    pcm_cache_check.pack()
+
     start_btn = ttk.Button(root, text="▶️ Start Transcription", command=start_processing)
     start_btn.pack(pady=15)
 
@@ -1,9 +1,28 @@
 import os
+from xml.sax.saxutils import escape
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 
 # === CONFIG ===
 INPUT_FOLDER = "../mp3-test"
 
+def append_paragraphs(doc, lines):
+    """
+    Append one paragraph per line in a single tree operation.
+    The <w:p> elements are built as one XML string, parsed once and spliced in
+    before the section properties, instead of one add_paragraph() per line.
+    """
+    xml = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' if line else "<w:p/>"
+        for line in lines
+    )
+    fragment = parse_xml(f"<w:body {nsdecls('w')}>{xml}</w:body>")
+    body = doc.element.body
+    sect_pr = body.sectPr
+    idx = body.index(sect_pr) if sect_pr is not None else len(body)
+    body[idx:idx] = list(fragment)
+
 def convert_txt_to_docx(txt_path):
     with open(txt_path, "r", encoding="utf-8") as f:
         lines = f.read().splitlines()
@@ -11,11 +30,7 @@ def convert_txt_to_docx(txt_path):
     doc = Document()
     doc.add_heading(f"Transcription: {os.path.basename(txt_path)}", level=1)
 
-    for line in lines:
-        if line.strip():
-            doc.add_paragraph(line.strip())
-        else:
-            doc.add_paragraph("")  # giữ dòng trống
+    append_paragraphs(doc, [line.strip() for line in lines])  # dòng trống -> đoạn trống
 
     docx_path = os.path.splitext(txt_path)[0] + ".docx"
     doc.save(docx_path)
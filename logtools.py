@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+logtools.py
+
+Views over the JSONL events log written by transcribe_mp3_v2.py.
+Each line is one event:
+  {"ts": "2025-08-19 14:19:00", "path": "...", "status": "ok", "dur": 12.3}
+  {"ts": "...", "path": "...", "status": "error", "error": "..."}
+  {"ts": "...", "path": "...", "status": "skip"}   (outputs already existed)
+  {"ts": "...", "path": "...", "status": "silent", "dur": 0.4}   (no speech, empty outputs)
+
+Rebuilds the old three text files on demand:
+  log_success.txt      "<ts> | SUCCESS | <path> | <dur> sec"  /  "<ts> | SKIP-SILENT | <path> | <dur> sec"
+  log_error.txt        "<ts> | ERROR | <path> | <error>"
+  processed_files.txt  one path per line (ok + skip + silent)
+
+Usage:
+  python logtools.py log/events.jsonl --out log/export
+
+Existing text files in --out are never overwritten (the old logs of
+transcribe_mp3_v2.py live in log/ and hold history not in events.jsonl);
+pass --force to replace an earlier export.
+"""
+
+import os
+import json
+import argparse
+
+
+def iter_events(events_file: str):
+    """Yield event dicts; blank or torn lines are skipped."""
+    with open(events_file, "rb") as f:
+        for ln in f:
+            try:
+                yield json.loads(ln)
+            except ValueError:
+                continue
+
+
+def export_text_logs(events_file: str, out_dir: str, force: bool = False) -> dict:
+    """
+    Write log_success.txt, log_error.txt and processed_files.txt; returns line counts.
+    Raises FileExistsError if one of them exists, unless force is set.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "success": os.path.join(out_dir, "log_success.txt"),
+        "error": os.path.join(out_dir, "log_error.txt"),
+        "processed": os.path.join(out_dir, "processed_files.txt"),
+    }
+    existing = [path for path in paths.values() if os.path.exists(path)]
+    if existing and not force:
+        raise FileExistsError(f"Refusing to overwrite {', '.join(existing)} (use --force or another --out)")
+    counts = dict.fromkeys(paths, 0)
+    files = {key: open(path, "w", encoding="utf-8") for key, path in paths.items()}
+    try:
+        for event in iter_events(events_file):
+            status, path = event.get("status"), event.get("path")
+            if status in ("ok", "silent"):
+                label = "SUCCESS" if status == "ok" else "SKIP-SILENT"
+                files["success"].write(f"{event['ts']} | {label} | {path} | {event.get('dur', 0):.2f} sec\n")
+                counts["success"] += 1
+            elif status == "error":
+                files["error"].write(f"{event['ts']} | ERROR | {path} | {event.get('error', '')}\n")
+                counts["error"] += 1
+            if status in ("ok", "skip", "silent"):
+                files["processed"].write(path + "\n")
+                counts["processed"] += 1
+    finally:
+        for f in files.values():
+            f.close()
+    return counts
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuild success/error/processed text logs from events.jsonl.")
+    parser.add_argument("events", type=str, nargs="?", default="log/events.jsonl",
+                        help="JSONL events log (default: log/events.jsonl)")
+    parser.add_argument("--out", type=str, default="log/export",
+                        help="Folder for the text logs (default: log/export)")
+    parser.add_argument("--force", action="store_true",
+                        help="Overwrite text logs already in --out")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.events):
+        print(f"❌ Events log not found: {args.events}")
+        return
+    try:
+        counts = export_text_logs(args.events, args.out, args.force)
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        return
+    print(f"✅ {counts['success']} success, {counts['error']} error, "
+          f"{counts['processed']} processed lines written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
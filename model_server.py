@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+model_server.py
+
+Keep a faster-whisper model warm between runs:
+- Loads each model once (cached by model/device/compute type)
+- Listens on a Unix socket (or host:port) for transcription requests
+- Streams segments back as they are decoded
+- Scripts use ModelClient.connect() and fall back to an in-process model
+  when no server is running (or the platform has no AF_UNIX)
+- parse_address() / bind_server() / connect() are also the socket layer of
+  transcribe_mp3_v2.py --serve and transcribe_mp3_client.py; this module
+  imports faster-whisper only when a model is loaded
+
+Protocol (one JSON object per line, UTF-8):
+  request : {"path": "...", "language": "vi", "model": "medium"}
+  response: {"segment": {"start": 0.0, "end": 2.5, "text": "..."}}  (repeated)
+            {"done": true}  or  {"error": "..."}
+
+Usage:
+  python model_server.py --model medium
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+import threading
+import socketserver
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "whisper_model_server.sock")
+
+# model_key -> WhisperModel
+model_instances = {}
+_model_lock = threading.Lock()
+
+
+def pick_cpu_compute_type() -> str:
+    """INT8 weights, with BF16 activations when the CPU supports them natively; FP32 without INT8 kernels."""
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types("cpu")
+    for compute_type in ("int8_bfloat16", "int8"):
+        if compute_type in supported:
+            return compute_type
+    return "float32"
+
+
+def pick_device() -> tuple:
+    """Return (device, compute_type): FP16 on GPU, quantized INT8 on CPU."""
+    import ctranslate2
+
+    if ctranslate2.get_cuda_device_count() > 0:
+        return "cuda", "float16"
+    return "cpu", pick_cpu_compute_type()
+
+
+def get_model(model_name: str, device: str = None, compute_type: str = None):
+    """Load a WhisperModel once per (model, device, compute_type) and reuse it."""
+    from faster_whisper import WhisperModel
+
+    if device is None:
+        device, auto_compute = pick_device()
+        compute_type = compute_type or auto_compute
+    elif compute_type is None:
+        compute_type = "float16" if device == "cuda" else pick_cpu_compute_type()
+
+    model_key = f"{model_name}_{device}_{compute_type}"
+    with _model_lock:
+        if model_key not in model_instances:
+            print(f"🎙️  Loading Whisper model: {model_name} (device={device}, compute_type={compute_type})")
+            model_instances[model_key] = WhisperModel(
+                model_name,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+                num_workers=1,
+            )
+        return model_instances[model_key]
+
+
+# =========================
+# Sockets
+# =========================
+def parse_address(address: str):
+    """'host:port' -> (host, port) for TCP; anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address and os.sep not in address:
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def bind_server(address: str, handler) -> socketserver.BaseServer:
+    """TCP server for 'host:port', Unix stream server for a socket path."""
+    addr = parse_address(address)
+    if isinstance(addr, tuple):
+        socketserver.TCPServer.allow_reuse_address = True
+        return socketserver.TCPServer(addr, handler)
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix sockets are not available on this platform; use host:port.")
+    # A socket file left behind by a killed server blocks bind()
+    if os.path.exists(addr):
+        os.unlink(addr)
+    return socketserver.UnixStreamServer(addr, handler)
+
+
+def remove_socket_file(address: str) -> None:
+    addr = parse_address(address)
+    if isinstance(addr, str) and os.path.exists(addr):
+        os.unlink(addr)
+
+
+def connect(address: str) -> socket.socket:
+    addr = parse_address(address)
+    if isinstance(addr, tuple):
+        return socket.create_connection(addr)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(addr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+# =========================
+# Server
+# =========================
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def _send(self, obj: dict) -> None:
+        self.wfile.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            try:
+                req = json.loads(raw)
+                model = get_model(req.get("model") or self.server.default_model)
+                segments, _ = model.transcribe(
+                    req["path"],
+                    language=req.get("language"),
+                    beam_size=1,
+                    vad_filter=True,
+                    condition_on_previous_text=False,
+                )
+                for seg in segments:
+                    self._send({"segment": {"start": seg.start, "end": seg.end, "text": seg.text}})
+                self._send({"done": True})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                self._send({"error": str(e)})
+
+
+def serve(address: str, default_model: str) -> None:
+    with bind_server(address, _RequestHandler) as server:
+        server.default_model = default_model
+        get_model(default_model)  # load before serving the first client
+        print(f"🟢 Model server listening on {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            remove_socket_file(address)
+
+
+# =========================
+# Client
+# =========================
+class ModelClient:
+    """Connection to a running model server."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._rfile = sock.makefile("rb")
+
+    @classmethod
+    def connect(cls, socket_path: str = DEFAULT_SOCKET):
+        """Return a client, or None if no server is listening."""
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock)
+
+    def iter_segments(self, path: str, language: str = None, model: str = None):
+        req = {"path": os.path.abspath(path), "language": language, "model": model}
+        self._sock.sendall((json.dumps(req, ensure_ascii=False) + "\n").encode("utf-8"))
+        for raw in self._rfile:
+            msg = json.loads(raw)
+            if "segment" in msg:
+                yield msg["segment"]
+            elif "error" in msg:
+                raise RuntimeError(msg["error"])
+            else:
+                return
+        raise ConnectionError("Model server closed the connection")
+
+    def transcribe(self, path: str, language: str = None, model: str = None) -> str:
+        return " ".join(s["text"].strip() for s in self.iter_segments(path, language, model)).strip()
+
+    def close(self) -> None:
+        self._rfile.close()
+        self._sock.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Keep a Whisper model loaded and serve transcriptions over a Unix socket.")
+    parser.add_argument("--model", type=str, default="medium",
+                        help="Model loaded at startup and used when a request names none (default: medium)")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET,
+                        help=f"Unix socket path or host:port (default: {DEFAULT_SOCKET})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        serve(args.socket, args.model)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
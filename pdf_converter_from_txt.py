@@ -11,11 +11,12 @@ INPUT_FOLDER = "../mp3-test"
 FONT_NAME = "Arial"
 FONT_PATH = "C:/Windows/Fonts/arial.ttf"  # hoặc DejaVuSans.ttf
 
-pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
 
-# === STYLE SETUP ===
-styles = getSampleStyleSheet()
-styles.add(ParagraphStyle(
+# === STYLE SETUP (built once, shared by every PDF) ===
+_STYLES = getSampleStyleSheet()
+_STYLES.add(ParagraphStyle(
     name='Justify',
     fontName=FONT_NAME,
     fontSize=12,
@@ -58,7 +59,7 @@ for dirpath, _, filenames in os.walk(INPUT_FOLDER):
             story = []
             title = f"Transcription: {filename}"
             story.append(Paragraph(title, title_style))
-            story.append(Paragraph(text, styles['Justify']))
+            story.append(Paragraph(text, _STYLES['Justify']))
             doc.build(story)
 
             print(f"✅ Saved (justify): {pdf_path}")
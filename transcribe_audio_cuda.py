@@ -1,19 +1,28 @@
 import os
+import mmap
+import re
+import atexit
 import sys
 import time
 import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import whisper
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
 from docx import Document
 
-# Try to import torch for CUDA checks (optional but recommended)
+# Try to import torch for GPU info (optional; faster-whisper does not need it)
 try:
     import torch
 except Exception:
     torch = None
 
+try:
+    import ctranslate2
+except Exception:
+    ctranslate2 = None
+
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
@@ -24,7 +33,7 @@ from reportlab.lib.units import mm
 # =========================
 # CLI ARGUMENTS
 # =========================
-parser = argparse.ArgumentParser(description="🎵 Transcribe audio files using Whisper (CUDA-ready, smart skip)")
+parser = argparse.ArgumentParser(description="🎵 Transcribe audio files using faster-whisper (CUDA-ready, smart skip)")
 parser.add_argument('-i', '--input', type=str, default="../mp3-test",
                     help='Input folder containing audio files')
 parser.add_argument('--ffmpeg', type=str, default=None,
@@ -36,12 +45,29 @@ parser.add_argument('--lang', type=str, default="vi",
 parser.add_argument('--device', type=str, default="auto",
                     choices=["auto", "cuda", "cpu"],
                     help='Device to run on: auto (prefer CUDA), cuda, cpu')
-parser.add_argument('--batch_size', type=int, default=16,
-                    help='(Hint) Batch size for decoding; whisper adapts internally')
+parser.add_argument('--batch_size', type=int, default=None,
+                    help='Audio chunks decoded per batch (default: auto from GPU memory, 1 on CPU)')
 parser.add_argument('--temperature', type=float, default=0.0,
                     help='Decoding temperature (0.0 = greedy)')
+parser.add_argument('--backend', type=str, default="ct2",
+                    choices=["ct2", "ort", "trtllm", "hf"],
+                    help='Inference backend: ct2 (faster-whisper), ort (ONNX Runtime via optimum), '
+                         'trtllm (TensorRT-LLM engine, CUDA only), '
+                         'hf (transformers + torch.compile + static cache, CUDA only)')
+parser.add_argument('--ort_cache', type=str, default="ort_models",
+                    help='Folder for exported + optimized ONNX models (backend=ort)')
+parser.add_argument('--trtllm_dir', type=str, default=None,
+                    help='Path to TensorRT-LLM examples/whisper (build.py, run.py) (backend=trtllm)')
+parser.add_argument('--engine_dir', type=str, default="trtllm_engines",
+                    help='Folder for built TensorRT-LLM engines (backend=trtllm)')
+parser.add_argument('--attn', type=str, default="sdpa",
+                    choices=["sdpa", "flash_attention_2"],
+                    help='Attention implementation for backend=hf (flash_attention_2 needs flash-attn)')
+parser.add_argument('--split_silence', action='store_true',
+                    help='Cut audio at silences (ffmpeg silencedetect) into <=30 s chunks and decode '
+                         'the chunks as one batch (backend=ct2)')
 parser.add_argument('--verbose', action='store_true',
-                    help='Print more details from Whisper')
+                    help='Print each decoded segment')
 args = parser.parse_args()
 
 # =========================
@@ -53,6 +79,8 @@ LOG_ERROR = os.path.join(ROOT_FOLDER, "transcribe_log_error.txt")
 PROCESSED_LIST = os.path.join(ROOT_FOLDER, "transcribe_processed_files.txt")
 
 SUPPORTED_EXT = [".mp3", ".m4a", ".wav", ".flac", ".ogg", ".aac", ".wma", ".webm"]
+_EXT_SET = frozenset(SUPPORTED_EXT)
+SAMPLE_RATE = 16000
 
 print(f"🎵 Supported formats: {', '.join(SUPPORTED_EXT)}")
 print(f"📂 Input folder: {ROOT_FOLDER}")
@@ -88,15 +116,57 @@ def ensure_ffmpeg(ffmpeg_path: str | None) -> str:
         )
     return cmd
 
+def iter_audio_files(root):
+    """
+    Yield (dirpath, filename, names) for supported audio files under root.
+    `names` is the set of file names in dirpath, read once by os.scandir, so
+    checking for sibling outputs needs no further stat() calls.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in _EXT_SET and entry.is_file():
+                yield current, entry.name, names
+        stack.extend(reversed(subdirs))
+
+def already_done(base, names=None):
+    """True when base.txt, base.docx and base.pdf all exist (.txt first: the usual miss)."""
+    if names is not None:
+        name = os.path.basename(base)
+        return name + ".txt" in names and name + ".docx" in names and name + ".pdf" in names
+    return os.path.exists(base + ".txt") and os.path.exists(base + ".docx") and os.path.exists(base + ".pdf")
+
+# path -> fd opened with O_APPEND: every os.write() lands whole at the end of the
+# file, even when another process (GUI + CUDA script) appends to the same log
+_fds = {}
+atexit.register(lambda: [os.close(fd) for fd in _fds.values()])
+
+def _log_fd(path):
+    fd = _fds.get(path)
+    if fd is None:
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = _fds[path] = os.open(path, flags, 0o644)
+    return fd
+
 def log_write(file, message):
-    with open(file, "a", encoding="utf-8") as f:
-        f.write(message + "\n")
+    os.write(_log_fd(file), (message + "\n").encode("utf-8"))
 
 def load_processed_files():
-    if os.path.exists(PROCESSED_LIST):
-        with open(PROCESSED_LIST, "r", encoding="utf-8") as f:
-            return set(f.read().splitlines())
-    return set()
+    """Processed paths as UTF-8 bytes, split straight from a read-only mmap (no str copy)."""
+    if not os.path.exists(PROCESSED_LIST) or os.path.getsize(PROCESSED_LIST) == 0:
+        return set()  # mmap cannot map an empty file
+    with open(PROCESSED_LIST, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return set(mm[:].splitlines())
 
 def save_txt(text, path):
     with open(path, "w", encoding="utf-8") as f:
@@ -109,17 +179,13 @@ def save_docx(text, path):
         doc.add_paragraph(para.strip())
     doc.save(path)
 
-def save_pdf(text, path, pdf_font="Helvetica"):
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(
-        name='Justify', alignment=4, fontName=pdf_font, fontSize=12, leading=18
-    ))
+def save_pdf(text, path):
     doc = SimpleDocTemplate(
         path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18
     )
     story = []
     for paragraph in (text or "").strip().split("\n\n"):
-        story.append(Paragraph(paragraph.strip().replace("\n", " "), styles['Justify']))
+        story.append(Paragraph(paragraph.strip().replace("\n", " "), _STYLES['Justify']))
         story.append(Spacer(1, 10 * mm))
     doc.build(story)
 
@@ -137,26 +203,62 @@ except RuntimeError as e:
 # =========================
 PDF_FONT = "Arial"
 try:
-    pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
+    if 'Arial' not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
 except Exception:
     PDF_FONT = "Helvetica"
     print("ℹ️  'arial.ttf' not found. Using built-in 'Helvetica' for PDFs.")
 
+# Built once: getSampleStyleSheet() recreates every named style on each call
+_STYLES = getSampleStyleSheet()
+_STYLES.add(ParagraphStyle(name='Justify', alignment=4, fontName=PDF_FONT, fontSize=12, leading=18))
+
+# =========================
+# Collect audio files
+# =========================
+# Skip conditions (checked before any model work):
+# 1) Already recorded in processed list
+# 2) OR all outputs already exist (txt, docx, pdf)
+processed = load_processed_files()
+all_files = []
+found = 0
+for dirpath, filename, names in iter_audio_files(ROOT_FOLDER):
+    found += 1
+    full_path = os.path.abspath(os.path.join(dirpath, filename))
+    if full_path.encode("utf-8") in processed or already_done(os.path.splitext(full_path)[0], names):
+        print(f"⏩ Skip {filename} (already processed or outputs exist)")
+        continue
+    all_files.append(full_path)
+
+print(f"📁 Total audio files found: {found} ({len(all_files)} to process)")
+if not all_files:
+    # Nothing left to do: don't pay for loading the model
+    sys.exit(0)
+
 # =========================
 # Device selection (CUDA)
 # =========================
+def cuda_available() -> bool:
+    # CTranslate2 is what actually runs the model, so ask it first
+    if ctranslate2 is not None:
+        try:
+            return ctranslate2.get_cuda_device_count() > 0
+        except Exception:
+            return False
+    return torch is not None and torch.cuda.is_available()
+
 def pick_device():
     # User-forced choice
     if args.device == "cpu":
         return "cpu", False
     if args.device == "cuda":
-        if torch is None or not torch.cuda.is_available():
-            print("⚠️ Requested CUDA but PyTorch CUDA is not available; falling back to CPU.")
+        if not cuda_available():
+            print("⚠️ Requested CUDA but no CUDA device is available; falling back to CPU.")
             return "cpu", False
         return "cuda", True
 
     # AUTO: prefer CUDA if available
-    if torch is not None and torch.cuda.is_available():
+    if cuda_available():
         return "cuda", True
     return "cpu", False
 
@@ -171,34 +273,358 @@ if has_cuda:
 else:
     print("🟡 Running on CPU")
 
-# FP16 is only for CUDA
-use_fp16 = bool(has_cuda)
+# FP16 on GPU, INT8 (dynamic quantization) on CPU
+compute_type = "float16" if has_cuda else "int8"
 
 # =========================
 # Load Whisper model on chosen device
 # =========================
-print(f"🧠 Loading Whisper model '{args.model}' on device: {device} (fp16={use_fp16}) ...")
-# openai/whisper supports the 'device' parameter
-model = whisper.load_model(args.model, device=device)
+def load_asr_model(model_name, device, compute_type):
+    """
+    Load a CTranslate2 Whisper model (downloaded/converted on first use).
+    CTranslate2 computes the cross-attention K/V once per encoder window and
+    grows the self-attention cache one step at a time while decoding.
+    """
+    return WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+        num_workers=1,
+    )
+
+def pick_batch_size():
+    """Largest batch tier that comfortably fits the first GPU's memory."""
+    if not has_cuda:
+        return 1
+    if torch is None or not torch.cuda.is_available():
+        return 8
+    total_gb = torch.cuda.get_device_properties(0).total_memory / 1024 ** 3
+    for min_gb, size in ((40, 32), (20, 16), (12, 8), (8, 4)):
+        if total_gb >= min_gb:
+            return size
+    return 2
+
+batch_size = args.batch_size or pick_batch_size()
+
+def optimize_onnx_folder(onnx_dir, num_heads, hidden_size):
+    """
+    Fuse attention into MultiHeadAttention nodes for every exported graph.
+    Runs once, right after export; the optimized graphs replace the originals.
+    """
+    for name in sorted(os.listdir(onnx_dir)):
+        if not name.endswith(".onnx"):
+            continue
+        onnx_path = os.path.join(onnx_dir, name)
+        cmd = [
+            sys.executable, "-m", "onnxruntime.transformers.optimizer",
+            "--input", onnx_path, "--output", onnx_path,
+            "--model_type", "bart",
+            "--num_heads", str(num_heads), "--hidden_size", str(hidden_size),
+            "--use_multi_head_attention",
+        ]
+        if has_cuda:
+            cmd += ["--use_gpu", "--float16"]
+        if os.path.exists(onnx_path + "_data"):
+            cmd.append("--use_external_data_format")
+        print(f"🔧 Optimizing {name} ...")
+        subprocess.run(cmd, check=True)
+
+def load_ort_pipeline(model_name):
+    """Export openai/whisper-<model> to ONNX once, optimize it, and wrap it in an HF ASR pipeline."""
+    from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    from transformers import AutoProcessor, pipeline
+
+    model_id = "openai/whisper-" + model_name
+    onnx_dir = os.path.join(os.path.abspath(args.ort_cache), "whisper-" + model_name + ("-cuda" if has_cuda else "-cpu"))
+    provider = "CUDAExecutionProvider" if has_cuda else "CPUExecutionProvider"
+
+    # decoder_with_past consumes the cached self-/cross-attention K/V, so each
+    # step only projects the newest token instead of re-running the whole prefix.
+    # Caches exported without it are rebuilt.
+    with_past = os.path.join(onnx_dir, "decoder_with_past_model.onnx")
+    if not os.path.exists(with_past):
+        print(f"📦 Exporting {model_id} to ONNX: {onnx_dir}")
+        exported = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True, use_cache=True)
+        exported.save_pretrained(onnx_dir)
+        AutoProcessor.from_pretrained(model_id).save_pretrained(onnx_dir)
+        optimize_onnx_folder(onnx_dir, exported.config.encoder_attention_heads, exported.config.d_model)
+        del exported
+
+    processor = AutoProcessor.from_pretrained(onnx_dir)
+    ort_model = ORTModelForSpeechSeq2Seq.from_pretrained(onnx_dir, provider=provider, use_cache=True)
+    return pipeline(
+        "automatic-speech-recognition",
+        model=ort_model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        chunk_length_s=30,
+        batch_size=batch_size,
+    )
+
+class TRTLLMWhisper:
+    """
+    Thin wrapper around the TensorRT-LLM whisper example (build.py / run.py).
+    The engine is built once per model size and reused from disk afterwards.
+    Audio is cut into 30 s windows, which are decoded together as one batch.
+    """
+
+    WINDOW = 30 * SAMPLE_RATE
+
+    def __init__(self, model_name, example_dir, engine_root, max_batch_size):
+        if not example_dir or not os.path.isfile(os.path.join(example_dir, "run.py")):
+            raise RuntimeError("--trtllm_dir must point to TensorRT-LLM/examples/whisper")
+        self.example_dir = os.path.abspath(example_dir)
+        self.engine_dir = os.path.join(os.path.abspath(engine_root), "whisper-" + model_name)
+        self.max_batch_size = max_batch_size
+        if not os.path.isdir(self.engine_dir):
+            self._build(model_name)
+
+        # run.py / whisper_utils.py live next to build.py and import each other
+        sys.path.insert(0, self.example_dir)
+        from run import WhisperTRTLLM
+        from whisper_utils import log_mel_spectrogram
+
+        self._log_mel = log_mel_spectrogram
+        self.model = WhisperTRTLLM(self.engine_dir, assets_dir=os.path.join(self.example_dir, "assets"))
+
+    def _build(self, model_name):
+        print(f"🏗️  Building TensorRT-LLM engine for '{model_name}' (one-time) ...")
+        subprocess.run([
+            sys.executable, "build.py",
+            "--model_name", model_name,
+            "--output_dir", self.engine_dir,
+            "--max_batch_size", str(self.max_batch_size),
+            "--dtype", "float16",
+            "--use_gpt_attention_plugin",
+            "--use_gemm_plugin",
+        ], cwd=self.example_dir, check=True)
+
+    def transcribe(self, audio, language):
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        prefix = f"<|startoftranscript|><|{language}|><|transcribe|><|notimestamps|>"
+        texts = []
+        for start in range(0, max(len(audio), 1), self.WINDOW * self.max_batch_size):
+            mels = []
+            for offset in range(start, min(start + self.WINDOW * self.max_batch_size, len(audio)), self.WINDOW):
+                window = torch.from_numpy(audio[offset:offset + self.WINDOW])
+                window = torch.nn.functional.pad(window, (0, self.WINDOW - window.shape[0]))
+                mels.append(self._log_mel(window, self.model.n_mels, device="cuda"))
+            if mels:
+                texts.extend(self.model.process_batch(torch.stack(mels).half(), prefix, num_beams=1))
+        return {"text": " ".join(t.strip() for t in texts)}
+
+# Warmup generations so torch.compile / CUDA graphs are captured before the real loop
+NUM_WARMUP = 3
+HF_WINDOW = 30 * SAMPLE_RATE
+
+def fused_attention():
+    """Restrict SDPA to the FlashAttention / memory-efficient kernels (no math fallback)."""
+    try:
+        from torch.nn.attention import SDPBackend, sdpa_kernel
+        return sdpa_kernel([SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION])
+    except ImportError:  # torch < 2.3
+        return torch.backends.cuda.sdp_kernel(enable_flash=True, enable_math=False, enable_mem_efficient=True)
+
+def load_hf_model(model_name):
+    """HF Whisper in fp16 with a static KV cache and a compiled forward."""
+    import torch._inductor.config
+    from transformers import AutoProcessor, WhisperForConditionalGeneration
+
+    torch._inductor.config.fx_graph_cache = True
+    torch._inductor.config.coordinate_descent_tuning = True
+
+    model_id = "openai/whisper-" + model_name
+    processor = AutoProcessor.from_pretrained(model_id)
+    hf_model = WhisperForConditionalGeneration.from_pretrained(
+        model_id, attn_implementation=args.attn, torch_dtype=torch.float16
+    ).to("cuda")
+    hf_model.generation_config.cache_implementation = "static"
+    hf_model.forward = torch.compile(hf_model.forward, mode="reduce-overhead", fullgraph=True)
+
+    print(f"🔥 Warming up compiled model ({NUM_WARMUP} runs) ...")
+    dummy = torch.zeros((1, hf_model.config.num_mel_bins, 3000), dtype=torch.float16, device="cuda")
+    with fused_attention():
+        for _ in range(NUM_WARMUP):
+            hf_model.generate(dummy, language=args.lang, task="transcribe")
+    return processor, hf_model
+
+print(f"🧠 Loading Whisper model '{args.model}' on device: {device} (backend={args.backend}, compute_type={compute_type}, batch_size={batch_size}) ...")
+if args.backend == "ort":
+    ort_asr = load_ort_pipeline(args.model)
+elif args.backend == "trtllm":
+    if not has_cuda or torch is None:
+        print("❌ backend=trtllm needs CUDA and PyTorch.")
+        sys.exit(1)
+    trt_model = TRTLLMWhisper(args.model, args.trtllm_dir, args.engine_dir, batch_size)
+elif args.backend == "hf":
+    if not has_cuda or torch is None:
+        print("❌ backend=hf needs CUDA and PyTorch.")
+        sys.exit(1)
+    hf_processor, hf_model = load_hf_model(args.model)
+else:
+    model = load_asr_model(args.model, device, compute_type)
+    # Batched pipeline: VAD chunks of one file are decoded together to keep the GPU busy
+    pipe = BatchedInferencePipeline(model=model)
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+def chunk_audio(audio, max_len=30.0, noise="-30dB", min_silence=0.5):
+    """
+    Split a 16 kHz waveform into (start, end) spans (seconds) no longer than
+    max_len, cutting in the middle of silences reported by ffmpeg silencedetect.
+    The already-decoded PCM is piped to ffmpeg, so the source is not decoded twice.
+    """
+    duration = len(audio) / SAMPLE_RATE
+    out = subprocess.run(
+        [_ffmpeg_cmd, "-hide_banner", "-nostats",
+         "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+         "-af", f"silencedetect=noise={noise}:d={min_silence}", "-f", "null", "-"],
+        input=audio.astype("float32").tobytes(), capture_output=True,
+    )
+    stderr = out.stderr.decode("utf-8", errors="replace")
+
+    cuts = []
+    silence_start = None
+    for kind, value in _SILENCE_RE.findall(stderr):
+        if kind == "start":
+            silence_start = max(0.0, float(value))
+        elif silence_start is not None:
+            cuts.append((silence_start + float(value)) / 2)
+            silence_start = None
+    cuts.append(duration)
+
+    spans = []
+    start = last_cut = 0.0
+    for cut in cuts:
+        while cut - start > max_len:
+            # Prefer the last silence inside the window, otherwise cut hard
+            end = last_cut if last_cut > start else start + max_len
+            spans.append((start, end))
+            start = end
+        last_cut = cut
+    if duration - start > 0:
+        spans.append((start, duration))
+    return spans
+
+def transcribe_ct2(audio):
+    # Whisper decode params
+    transcribe_kwargs = {
+        "language": args.lang,
+        "temperature": args.temperature, # 0.0 => greedy
+        "beam_size": 1,
+        "vad_filter": True,              # skip silence before it reaches the decoder
+        "condition_on_previous_text": False,
+    }
+
+    if args.split_silence:
+        # Silence-bounded chunks are independent, so decode them as batches (4 at a time on CPU)
+        spans = chunk_audio(audio)
+        # faster-whisper >= 1.2 takes clip bounds in seconds (it converts to samples itself)
+        clips = [{"start": a, "end": b} for a, b in spans]
+        segments, _info = pipe.transcribe(
+            audio, batch_size=batch_size if batch_size > 1 else 4,
+            clip_timestamps=clips, **transcribe_kwargs
+        )
+        segments = sorted(segments, key=lambda seg: seg.start)
+    elif batch_size > 1:
+        segments, _info = pipe.transcribe(audio, batch_size=batch_size, **transcribe_kwargs)
+    else:
+        segments, _info = model.transcribe(audio, **transcribe_kwargs)
+    parts = []
+    for seg in segments:
+        if args.verbose:
+            print(f"   [{seg.start:7.2f} -> {seg.end:7.2f}] {seg.text.strip()}")
+        parts.append(seg.text.strip())
+    return " ".join(parts).strip()
+
+def transcribe_ort(audio):
+    result = ort_asr({"raw": audio, "sampling_rate": SAMPLE_RATE}, generate_kwargs={"language": args.lang, "task": "transcribe"})
+    return (result.get("text") or "").strip()
+
+def transcribe_trtllm(audio):
+    return (trt_model.transcribe(audio, language=args.lang).get("text") or "").strip()
+
+def transcribe_hf(audio):
+    texts = []
+    # One 30 s window at a time keeps the input shape identical to the warmup runs,
+    # so the captured graphs are reused instead of recompiled.
+    for offset in range(0, len(audio), HF_WINDOW):
+        # device="cuda": the STFT / log-mel runs on the GPU instead of NumPy
+        input_features = hf_processor.feature_extractor(
+            audio[offset:offset + HF_WINDOW], sampling_rate=SAMPLE_RATE,
+            return_tensors="pt", device="cuda",
+        ).input_features.to("cuda", dtype=torch.float16)
+        with torch.inference_mode(), fused_attention():
+            ids = hf_model.generate(input_features, language=args.lang, task="transcribe")
+        texts.append(hf_processor.batch_decode(ids, skip_special_tokens=True)[0].strip())
+    return " ".join(texts).strip()
+
+if args.split_silence and args.backend != "ct2":
+    print("ℹ️  --split_silence only applies to backend=ct2; ignoring it.")
+
+transcribe_file = {
+    "ct2": transcribe_ct2,
+    "ort": transcribe_ort,
+    "trtllm": transcribe_trtllm,
+    "hf": transcribe_hf,
+}[args.backend]
+
+class AudioPrefetcher:
+    """
+    Decode (ffmpeg/PyAV -> 16 kHz mono float32) the next file on a background
+    thread while the current one is on the GPU. Only one file is kept ahead.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._pending = {}
+
+    def prefetch(self, path):
+        if path not in self._pending:
+            self._pending[path] = self._pool.submit(decode_audio, path, sampling_rate=SAMPLE_RATE)
+
+    def get(self, path):
+        future = self._pending.pop(path, None)
+        # Anything else queued belonged to a file that got skipped
+        for stale in list(self._pending):
+            self._pending.pop(stale).cancel()
+        if future is None:
+            return decode_audio(path, sampling_rate=SAMPLE_RATE)
+        return future.result()
+
+prefetcher = AudioPrefetcher()
 
 # =========================
-# Collect audio files
+# Background writers (TXT/DOCX/PDF)
 # =========================
-all_files = []
-for dirpath, _, filenames in os.walk(ROOT_FOLDER):
-    for filename in filenames:
-        if any(filename.lower().endswith(ext) for ext in SUPPORTED_EXT):
-            full_path = os.path.abspath(os.path.join(dirpath, filename))
-            all_files.append(full_path)
-
-print(f"📁 Total audio files found: {len(all_files)}")
+# Output rendering is CPU/IO work that does not need the GPU; run it on
+# worker threads so the next file starts transcribing right away.
+writer = ThreadPoolExecutor(max_workers=4)
+pending_writes = []
+
+def drain_writes(wait=False):
+    """Log files whose outputs are fully written; keep unfinished ones pending."""
+    still_pending = []
+    for full_path, filename, futures, duration in pending_writes:
+        if not wait and not all(f.done() for f in futures):
+            still_pending.append((full_path, filename, futures, duration))
+            continue
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {errors[0]}")
+            print(f"❌ [ERROR] {filename}: {errors[0]}")
+            continue
+        log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path} | {duration:.2f} sec")
+        # Mark as processed
+        log_write(PROCESSED_LIST, full_path)
+    pending_writes[:] = still_pending
 
 # =========================
 # Transcribe loop (smart skip)
 # =========================
-processed = load_processed_files()
-
-for full_path in all_files:
+for idx, full_path in enumerate(all_files):
     filename = os.path.basename(full_path)
     base_name = os.path.splitext(filename)[0]
     out_dir = os.path.dirname(full_path)
@@ -208,14 +634,6 @@ for full_path in all_files:
     docx_path = os.path.join(out_dir, base_name + ".docx")
     pdf_path = os.path.join(out_dir, base_name + ".pdf")
 
-    # Skip conditions:
-    # 1) Already recorded in processed list
-    # 2) OR all outputs already exist (txt, docx, pdf)
-    already_converted = os.path.exists(txt_path) and os.path.exists(docx_path) and os.path.exists(pdf_path)
-    if full_path in processed or already_converted:
-        print(f"⏩ Skip {filename} (already processed or outputs exist)")
-        continue
-
     try:
         if not os.path.exists(full_path):
             print(f"⚠️ File not found: {full_path}")
@@ -227,30 +645,28 @@ for full_path in all_files:
 
         start_time = time.time()
 
-        # Whisper decode params
-        transcribe_kwargs = {
-            "language": args.lang,
-            "fp16": use_fp16,                # GPU => True, CPU => False (avoid FP16 warning)
-            "temperature": args.temperature, # 0.0 => greedy
-            "verbose": args.verbose
-        }
-
-        result = model.transcribe(full_path, **transcribe_kwargs)
-        text = (result.get("text") or "").strip()
-
-        # Save outputs (will overwrite partial/old outputs if any)
-        save_txt(text, txt_path)
-        save_docx(text, docx_path)
-        save_pdf(text, pdf_path, pdf_font=PDF_FONT)
+        audio = prefetcher.get(full_path)
+        if idx + 1 < len(all_files):
+            prefetcher.prefetch(all_files[idx + 1])
+        text = transcribe_file(audio)
 
         duration = time.time() - start_time
         print(f"✅ [DONE] {filename} in {duration:.2f} seconds")
         print(f"🕒 End time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-        log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path} | {duration:.2f} sec")
-        # Mark as processed
-        log_write(PROCESSED_LIST, full_path)
+        # Save outputs in the background (will overwrite partial/old outputs if any)
+        futures = [
+            writer.submit(save_txt, text, txt_path),
+            writer.submit(save_docx, text, docx_path),
+            writer.submit(save_pdf, text, pdf_path),
+        ]
+        pending_writes.append((full_path, filename, futures, duration))
 
     except Exception as e:
         log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(e)}")
         print(f"❌ [ERROR] {filename}: {e}")
+
+    drain_writes()
+
+drain_writes(wait=True)
+writer.shutdown(wait=True)
@@ -1,9 +1,11 @@
 import os
+import mmap
 import sys
-import whisper
 import time
 import argparse
 import subprocess
+import ctranslate2
+from faster_whisper import WhisperModel
 from docx import Document
 from datetime import datetime
 from reportlab.pdfbase import pdfmetrics
@@ -32,6 +34,7 @@ LOG_ERROR = os.path.join(ROOT_FOLDER, "transcribe_log_error.txt")
 PROCESSED_LIST = os.path.join(ROOT_FOLDER, "transcribe_processed_files.txt")
 
 SUPPORTED_EXT = [".mp3", ".m4a", ".wav", ".flac", ".ogg", ".aac", ".wma", ".webm"]
+_EXT_SET = frozenset(SUPPORTED_EXT)
 
 print(f"🎵 Supported formats: {', '.join(SUPPORTED_EXT)}")
 print(f"📂 Input folder: {ROOT_FOLDER}")
@@ -66,17 +69,44 @@ except RuntimeError as e:
     print(f"❌ {e}")
     sys.exit(1)
 
-# === Load Whisper model ===
-model = whisper.load_model(args.model)
+# === Load Whisper model (CTranslate2: FP16 on GPU, INT8 on CPU) ===
+# CPU: INT8 weights (dynamic quantization), with BF16 activations when the CPU
+# supports them natively; plain FP32 only if this CPU build has no INT8 kernels
+def pick_cpu_compute_type():
+    supported = ctranslate2.get_supported_compute_types("cpu")
+    for compute_type in ("int8_bfloat16", "int8"):
+        if compute_type in supported:
+            return compute_type
+    return "float32"
+
+def load_asr_model(model_name):
+    has_cuda = ctranslate2.get_cuda_device_count() > 0
+    device = "cuda" if has_cuda else "cpu"
+    compute_type = "float16" if has_cuda else pick_cpu_compute_type()
+    print(f"🧠 Loading Whisper model '{model_name}' on {device} ({compute_type})")
+    return WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+        num_workers=1,
+    )
+
+model = load_asr_model(args.model)
 
 # === Setup PDF font with safe fallback ===
 PDF_FONT = "Arial"
 try:
-    pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
+    if 'Arial' not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
 except Exception:
     PDF_FONT = "Helvetica"
     print("ℹ️  'arial.ttf' not found. Using built-in 'Helvetica' for PDFs.")
 
+# Built once: getSampleStyleSheet() recreates every named style on each call
+_STYLES = getSampleStyleSheet()
+_STYLES.add(ParagraphStyle(name='Justify', alignment=4, fontName=PDF_FONT, fontSize=12, leading=18))
+
 # === Utility Functions ===
 def save_txt(text, path):
     with open(path, "w", encoding="utf-8") as f:
@@ -89,16 +119,12 @@ def save_docx(text, path):
     doc.save(path)
 
 def save_pdf(text, path):
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(
-        name='Justify', alignment=4, fontName=PDF_FONT, fontSize=12, leading=18
-    ))
     doc = SimpleDocTemplate(
         path, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18
     )
     story = []
     for paragraph in text.strip().split("\n\n"):
-        story.append(Paragraph(paragraph.strip().replace("\n", " "), styles['Justify']))
+        story.append(Paragraph(paragraph.strip().replace("\n", " "), _STYLES['Justify']))
         story.append(Spacer(1, 10 * mm))
     doc.build(story)
 
@@ -106,22 +132,52 @@ def log_write(file, message):
     with open(file, "a", encoding="utf-8") as f:
         f.write(message + "\n")
 
+def iter_audio_files(root):
+    """
+    Yield (dirpath, filename, names) for supported audio files under root.
+    `names` is the set of file names in dirpath, read once by os.scandir, so
+    checking for sibling outputs needs no further stat() calls.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in _EXT_SET and entry.is_file():
+                yield current, entry.name, names
+        stack.extend(reversed(subdirs))
+
+def already_done(base, names=None):
+    """True when base.txt, base.docx and base.pdf all exist (.txt first: the usual miss)."""
+    if names is not None:
+        name = os.path.basename(base)
+        return name + ".txt" in names and name + ".docx" in names and name + ".pdf" in names
+    return os.path.exists(base + ".txt") and os.path.exists(base + ".docx") and os.path.exists(base + ".pdf")
+
 def load_processed_files():
-    if os.path.exists(PROCESSED_LIST):
-        with open(PROCESSED_LIST, "r", encoding="utf-8") as f:
-            return set(f.read().splitlines())
-    return set()
+    """Processed paths as UTF-8 bytes, split straight from a read-only mmap (no str copy)."""
+    if not os.path.exists(PROCESSED_LIST) or os.path.getsize(PROCESSED_LIST) == 0:
+        return set()  # mmap cannot map an empty file
+    with open(PROCESSED_LIST, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return set(mm[:].splitlines())
 
 # === MAIN LOGIC ===
 processed = load_processed_files()
 all_files = []
 
-for dirpath, _, filenames in os.walk(ROOT_FOLDER):
-    for filename in filenames:
-        if any(filename.lower().endswith(ext) for ext in SUPPORTED_EXT):
-            full_path = os.path.abspath(os.path.join(dirpath, filename))
-            if full_path not in processed:
-                all_files.append(full_path)
+for dirpath, filename, names in iter_audio_files(ROOT_FOLDER):
+    full_path = os.path.abspath(os.path.join(dirpath, filename))
+    if full_path.encode("utf-8") in processed or already_done(os.path.splitext(full_path)[0], names):
+        continue
+    all_files.append(full_path)
 
 print(f"📁 Total audio files to process: {len(all_files)}")
 
@@ -138,8 +194,9 @@ for full_path in all_files:
         print(f"⏱️  Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         start_time = time.time()
 
-        result = model.transcribe(full_path, language=args.lang)
-        text = result.get("text", "").strip()
+        segments, _ = model.transcribe(full_path, language=args.lang, beam_size=1,
+                                       vad_filter=True, condition_on_previous_text=False)
+        text = " ".join(s.text.strip() for s in segments).strip()
 
         out_dir = os.path.dirname(full_path)
         txt_path = os.path.join(out_dir, base_name + ".txt")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+transcribe_mp3_client.py
+
+Send file or folder paths to a running `transcribe_mp3_v2.py --serve` so the
+model does not have to be loaded again for every run.
+
+Protocol (UTF-8, one line each way per path):
+  client: /abs/path/to/file-or-folder
+  server: OK   or   ERR <reason>
+
+Usage:
+  python transcribe_mp3_v2.py --serve /tmp/transcribe_mp3.sock      (once)
+  python transcribe_mp3_client.py ../mp3-test lecture1.mp3 --socket /tmp/transcribe_mp3.sock
+  python transcribe_mp3_client.py ../mp3-test --socket 127.0.0.1:8765
+"""
+
+import os
+import sys
+import argparse
+
+from model_server import connect
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Queue files/folders on a running transcribe_mp3_v2.py --serve.")
+    parser.add_argument("paths", nargs="+", help="Audio files or folders to transcribe")
+    parser.add_argument("--socket", type=str, default="/tmp/transcribe_mp3.sock",
+                        help="Unix socket path or host:port of the server (default: /tmp/transcribe_mp3.sock)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        sock = connect(args.socket)
+    except OSError as e:
+        print(f"❌ Cannot reach server at {args.socket}: {e}")
+        sys.exit(1)
+
+    failed = 0
+    with sock, sock.makefile("rb") as replies:
+        for path in args.paths:
+            path = os.path.abspath(path)
+            sock.sendall((path + "\n").encode("utf-8"))
+            reply = replies.readline().decode("utf-8").strip()
+            if not reply:
+                print("❌ Server closed the connection")
+                sys.exit(1)
+            if reply == "OK":
+                print(f"✅ {path}")
+            else:
+                failed += 1
+                print(f"❌ {path}: {reply[4:] if reply.startswith('ERR ') else reply}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os
-import whisper
+import mmap
+import ctranslate2
+from faster_whisper import WhisperModel
 from docx import Document
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
@@ -13,10 +15,22 @@ LOG_SUCCESS = "log_success.txt"
 LOG_ERROR = "log_error.txt"
 PROCESSED_LIST = "processed_files.txt"
 SUPPORTED_EXT = [".mp3"]
+_EXT_SET = frozenset(SUPPORTED_EXT)
 
 # === Load Whisper model (change to 'small' or 'large' if needed) ===
-# model = whisper.load_model("medium")
-model = whisper.load_model("large")  # hoặc "large-v3"
+# CTranslate2 backend: FP16 on GPU, INT8 dynamic quantization on CPU
+def load_asr_model(model_name):
+    has_cuda = ctranslate2.get_cuda_device_count() > 0
+    return WhisperModel(
+        model_name,
+        device="cuda" if has_cuda else "cpu",
+        compute_type="float16" if has_cuda else "int8",
+        cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+        num_workers=1,
+    )
+
+# model = load_asr_model("medium")
+model = load_asr_model("large")  # hoặc "large-v3"
 
 # === Setup PDF font ===
 pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))  # Ensure arial.ttf is in the same folder or installed system-wide
@@ -48,43 +62,71 @@ def log_write(file, message):
     with open(file, "a", encoding="utf-8") as f:
         f.write(message + "\n")
 
+def iter_audio_files(root):
+    """
+    Yield (dirpath, filename, names) for supported audio files under root.
+    `names` is the set of file names in dirpath, read once by os.scandir, so
+    checking for sibling outputs needs no further stat() calls.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in _EXT_SET and entry.is_file():
+                yield current, entry.name, names
+        stack.extend(reversed(subdirs))
+
+def already_done(base, names=None):
+    """True when base.txt, base.docx and base.pdf all exist (.txt first: the usual miss)."""
+    if names is not None:
+        name = os.path.basename(base)
+        return name + ".txt" in names and name + ".docx" in names and name + ".pdf" in names
+    return os.path.exists(base + ".txt") and os.path.exists(base + ".docx") and os.path.exists(base + ".pdf")
+
 def load_processed_files():
-    if os.path.exists(PROCESSED_LIST):
-        with open(PROCESSED_LIST, "r", encoding="utf-8") as f:
-            return set(f.read().splitlines())
-    return set()
+    """Processed paths as UTF-8 bytes, split straight from a read-only mmap (no str copy)."""
+    if not os.path.exists(PROCESSED_LIST) or os.path.getsize(PROCESSED_LIST) == 0:
+        return set()  # mmap cannot map an empty file
+    with open(PROCESSED_LIST, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return set(mm[:].splitlines())
 
 # === Main logic ===
 processed = load_processed_files()
 
-for dirpath, _, filenames in os.walk(ROOT_FOLDER):
-    for filename in filenames:
-        if not any(filename.lower().endswith(ext) for ext in SUPPORTED_EXT):
-            continue
-
-        full_path = os.path.join(dirpath, filename)
-        base_name = os.path.splitext(filename)[0]
-
-        if full_path in processed:
-            print(f"[SKIP] {filename}")
-            continue
-
-        try:
-            print(f"[RUNNING] {filename}")
-            result = model.transcribe(full_path, language="vi")
-            text = result["text"].strip()
-
-            # Output paths
-            txt_path = os.path.join(dirpath, base_name + ".txt")
-            docx_path = os.path.join(dirpath, base_name + ".docx")
-            pdf_path = os.path.join(dirpath, base_name + ".pdf")
-
-            save_txt(text, txt_path)
-            save_docx(text, docx_path)
-            save_pdf(text, pdf_path)
-
-            log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path}")
-            log_write(PROCESSED_LIST, full_path)
-        except Exception as e:
-            log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(e)}")
-            print(f"[ERROR] {filename}: {e}")
+for dirpath, filename, names in iter_audio_files(ROOT_FOLDER):
+    full_path = os.path.join(dirpath, filename)
+    base_name = os.path.splitext(filename)[0]
+
+    if full_path.encode("utf-8") in processed or already_done(os.path.join(dirpath, base_name), names):
+        print(f"[SKIP] {filename}")
+        continue
+
+    try:
+        print(f"[RUNNING] {filename}")
+        segments, _ = model.transcribe(full_path, language="vi", beam_size=1,
+                                       vad_filter=True, condition_on_previous_text=False)
+        text = " ".join(s.text.strip() for s in segments).strip()
+
+        # Output paths
+        txt_path = os.path.join(dirpath, base_name + ".txt")
+        docx_path = os.path.join(dirpath, base_name + ".docx")
+        pdf_path = os.path.join(dirpath, base_name + ".pdf")
+
+        save_txt(text, txt_path)
+        save_docx(text, docx_path)
+        save_pdf(text, pdf_path)
+
+        log_write(LOG_SUCCESS, f"{datetime.now()} | SUCCESS | {full_path}")
+        log_write(PROCESSED_LIST, full_path)
+    except Exception as e:
+        log_write(LOG_ERROR, f"{datetime.now()} | ERROR | {full_path} | {str(e)}")
+        print(f"[ERROR] {filename}: {e}")
@@ -6,26 +6,77 @@ transcribe_mp3_v2.py
 
 Improvements vs v1:
 - Auto-create log folder/files if missing
-- Skip files already processed (processed_files.txt)
-- Skip if all outputs (.txt/.docx/.pdf) already exist
-- Robust logging with timestamps
+- Skip files already processed (events.jsonl, with a pickled snapshot
+  next to it so startup only parses events added since)
+- Skip if all outputs (.txt/.docx/.pdf) already exist; if only the .txt
+  exists, DOCX/PDF are rebuilt from it without re-transcribing
+- One JSONL events log (ok / error / skip / silent) with timestamps; logtools.py
+  turns it back into log_success / log_error / processed_files text files
 - Fallback PDF font if Arial not available
-- CLI args: --root, --model, --lang, --ext, --device
+- CLI args: --root, --model, --lang, --ext, --device (auto|cpu|cuda), --compute_type
 - Normalized absolute paths for reliability
+- faster-whisper (CTranslate2) backend: INT8 on CPU, FP16 on GPU
+- Batched inference: VAD chunks of each file are decoded in batches
+  (BATCH_SIZE env var, default 16 on GPU / 4 on CPU)
+- asyncio pipeline: audio decoding and TXT/DOCX/PDF writing run on an I/O
+  thread pool while the model transcribes the next file; a file is marked
+  processed only after all three outputs have been written
+- Optional decoded-audio cache (--pcm_cache): 16 kHz PCM is kept in a hidden
+  .<name>.pcm.npz next to the source so reruns skip audio decoding;
+  --purge_pcm removes it once the file's outputs are written
+- Audio decoded in-process to 16 kHz mono float32 with PyAV (no ffmpeg
+  subprocess per file); the ffmpeg binary is no longer required
+- --flash_attention: CTranslate2 fused attention kernels on CUDA
+- Multi-GPU (--gpus "0,1"): one model replica per GPU, one file in flight per GPU
+- --pack-zip: outputs of each folder go into one outputs.zip (ZIP_STORED)
+  instead of 3 small files per input; the archive stays open across files and
+  its files are logged as done when it is closed (every 256 files / 256 MB, at exit)
+- Decoding flags: --beam_size, --temperature and --without_timestamps apply to
+  the batched pipeline (one temperature, no conditioning on previous text);
+  --fast is greedy batched decoding. A temperature fallback schedule, --best_of,
+  --condition_on_previous_text, --no_speech_threshold or
+  --compression_ratio_threshold switch to sequential WhisperModel.transcribe()
+- VAD pre-pass (Silero, bundled with faster-whisper): silent files get empty
+  outputs and a SKIP-SILENT event without ever reaching the model; the speech
+  clips it finds are passed as clip_timestamps, so VAD runs once per file
+- Server mode (--serve <socket|host:port>): load the model once and transcribe
+  file/folder paths sent by transcribe_mp3_client.py, one per line
+
+--model takes a size name (downloaded already converted) or a local
+CTranslate2 model folder, e.g. one converted once with:
+  ct2-transformers-converter --model openai/whisper-large \
+      --quantization int8 --output_dir models/whisper-large-int8
 """
 
+import io
 import os
+import re
 import sys
+import json
 import time
+import pickle
+import asyncio
 import argparse
+import socketserver
+import threading
+import zipfile
+import functools
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 
+from model_server import bind_server, remove_socket_file
+
 # 3rd-party
+import numpy as np
+
 try:
-    import whisper
+    import ctranslate2
+    from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
 except Exception as e:
-    print("❌ Missing dependency: whisper (pip install -U openai-whisper) —", e)
+    print("❌ Missing dependency: faster-whisper (pip install -U faster-whisper) —", e)
     sys.exit(1)
 
 try:
@@ -56,68 +107,141 @@ def ensure_parent_dir(path: str) -> None:
         os.makedirs(parent, exist_ok=True)
 
 
-def safe_log_append(file_path: str, message: str) -> None:
-    """Append a message to log file, creating parent dir if needed."""
-    ensure_parent_dir(file_path)
-    with open(file_path, "a", encoding="utf-8") as f:
-        f.write(message + "\n")
+# Event statuses that mean "nothing left to do for this path"
+DONE_STATUSES = ("ok", "skip", "silent")
+
+
+def processed_cache_path(events_file: str) -> str:
+    return events_file + ".pkl"
+
+
+def load_processed_set(events_file: str) -> set:
+    """
+    Load processed file paths (as absolute paths) from the events log into a set.
+    A pickled snapshot (events.jsonl.pkl) covers the log up to the byte offset
+    stored with it, so only events appended since then are parsed. The snapshot
+    also records the log's inode: it is discarded when the log was deleted,
+    replaced or truncated since.
+    """
+    if not os.path.exists(events_file):
+        return set()  # a stale snapshot must not outlive its log
+    st = os.stat(events_file)
+    processed, offset = set(), 0
+    cache_file = processed_cache_path(events_file)
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                inode, offset, processed = pickle.load(f)
+            if inode != st.st_ino or offset > st.st_size:
+                processed, offset = set(), 0  # log was replaced or truncated since the snapshot
+        except Exception:
+            processed, offset = set(), 0  # unreadable or old-format snapshot: rebuild from the log
+    with open(events_file, "rb") as f:
+        f.seek(offset)
+        for ln in f:
+            try:
+                event = json.loads(ln)
+            except ValueError:
+                continue  # blank or torn line
+            if event.get("status") in DONE_STATUSES:
+                processed.add(event["path"])
+    return processed
+
+
+def import_legacy_processed(events_file: str, processed_list_file: str) -> int:
+    """
+    Seed a new events log from the processed_files.txt written by older versions:
+    one "skip" event per listed path. Does nothing once the events log exists.
+    Returns the number of paths imported.
+    """
+    if os.path.exists(events_file) or not os.path.exists(processed_list_file):
+        return 0
+    with open(processed_list_file, "r", encoding="utf-8") as f:
+        paths = dict.fromkeys(ln.strip() for ln in f if ln.strip())
+    tmp = events_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for path in paths:
+            f.write(json.dumps({"ts": human_time(), "path": path, "status": "skip"}, ensure_ascii=False) + "\n")
+    os.replace(tmp, events_file)
+    return len(paths)
+
+
+def save_processed_cache(events_file: str, processed: set) -> None:
+    """Snapshot the processed set with the log inode and size it covers (atomic replace)."""
+    if not os.path.exists(events_file):
+        return
+    st = os.stat(events_file)
+    cache_file = processed_cache_path(events_file)
+    tmp = cache_file + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((st.st_ino, st.st_size, processed), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_file)
 
 
-def load_processed_set(processed_list_file: str) -> set:
-    """Load processed file paths (as absolute paths) into a set."""
-    if os.path.exists(processed_list_file):
-        with open(processed_list_file, "r", encoding="utf-8") as f:
-            lines = [ln.strip() for ln in f.read().splitlines() if ln.strip()]
-        return set(lines)
-    return set()
+# common locations for Arial on Windows/Linux; or local working dir (file dropped alongside script)
+_ARIAL_CANDIDATES = (
+    "arial.ttf",
+    r"C:\Windows\Fonts\arial.ttf",
+    r"/usr/share/fonts/truetype/msttcorefonts/Arial.ttf",
+    r"/usr/share/fonts/truetype/msttcorefonts/arial.ttf",
+)
 
 
+@functools.lru_cache(maxsize=1)
 def register_pdf_font() -> str:
     """
     Try to register Arial; if not found, fall back to Helvetica (built-in).
-    Returns the font name to use.
+    Returns the font name to use. Cached: the probe and the (global) font
+    registration run once per process, however often this is called.
     """
-    try:
-        # common locations for Arial on Windows; or local working dir
-        candidates = [
-            "arial.ttf",
-            r"C:\Windows\Fonts\arial.ttf",
-            r"/usr/share/fonts/truetype/msttcorefonts/Arial.ttf",
-            r"/usr/share/fonts/truetype/msttcorefonts/arial.ttf",
-        ]
-        for c in candidates:
-            if os.path.exists(c):
-                pdfmetrics.registerFont(TTFont("Arial", c))
-                return "Arial"
-        # try register anyway in current dir (in case user drops file alongside script)
-        if os.path.exists("arial.ttf"):
-            pdfmetrics.registerFont(TTFont("Arial", "arial.ttf"))
+    font_path = next((p for p in map(Path, _ARIAL_CANDIDATES) if p.is_file()), None)
+    if font_path is not None:
+        try:
+            pdfmetrics.registerFont(TTFont("Arial", str(font_path)))
             return "Arial"
-    except Exception:
-        pass
+        except Exception:
+            pass
     # Fallback
     return "Helvetica"
 
 
+# PDF styling is built once at import: getSampleStyleSheet() recreates every
+# named style on each call, and add() refuses a name that already exists
+PDF_FONT = register_pdf_font()
+_PDF_STYLES = getSampleStyleSheet()
+# alignment=4 means justify in reportlab
+_PDF_STYLES.add(ParagraphStyle(name="Justify", alignment=4,
+                               fontName=PDF_FONT, fontSize=12, leading=18))
+SPACER = Spacer(1, 10 * mm)  # shared: build() never mutates a Spacer
+# Blank-line paragraph split; whitespace-only lines between paragraphs count as blank
+_PARA_SPLIT = re.compile(r"\n\s*\n").split
+_NL_TO_SPACE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
+
 def save_txt(text: str, path: str) -> None:
     ensure_parent_dir(path)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
+    # Encode once and hand the whole buffer to a single write(), no text-layer chunking
+    with open(path, "wb") as f:
+        f.write(text.encode("utf-8"))
 
 
-def save_docx(text: str, path: str) -> None:
-    ensure_parent_dir(path)
+def load_txt(path: str) -> str:
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def save_docx(text: str, path) -> None:
+    if isinstance(path, str):
+        ensure_parent_dir(path)
     doc = Document()
     doc.add_paragraph(text)
     doc.save(path)
 
 
-def save_pdf(text: str, path: str, font_name: str = "Helvetica") -> None:
-    ensure_parent_dir(path)
-    styles = getSampleStyleSheet()
-    # alignment=4 means justify in reportlab
-    styles.add(ParagraphStyle(name='Justify', alignment=4,
-                              fontName=font_name, fontSize=12, leading=18))
+def save_pdf(text: str, path, style: ParagraphStyle | None = None) -> None:
+    if isinstance(path, str):
+        ensure_parent_dir(path)
+    style = style or _PDF_STYLES["Justify"]
 
     doc = SimpleDocTemplate(
         path, pagesize=A4,
@@ -126,13 +250,181 @@ def save_pdf(text: str, path: str, font_name: str = "Helvetica") -> None:
     )
 
     story = []
-    for paragraph in text.strip().split("\n\n"):
-        story.append(Paragraph(paragraph.strip().replace("\n", " "), styles['Justify']))
-        story.append(Spacer(1, 10 * mm))
+    for paragraph in _PARA_SPLIT(text.strip()):
+        p = paragraph.translate(_NL_TO_SPACE)
+        if p:
+            story.append(Paragraph(p, style))
+            story.append(SPACER)
 
     doc.build(story)
 
 
+# =========================
+# Per-directory ZIP outputs (--pack-zip)
+# =========================
+ZIP_NAME = "outputs.zip"
+
+
+def render_output(ext: str, text: str) -> bytes:
+    """TXT/DOCX/PDF rendered in memory instead of to a file."""
+    if ext == ".txt":
+        return text.encode("utf-8")
+    buf = io.BytesIO()
+    (save_docx if ext == ".docx" else save_pdf)(text, buf)
+    return buf.getvalue()
+
+
+class ZipOutputs:
+    """
+    One open archive (ZIP_STORED) per folder for the whole run. Appends go to a
+    copy, outputs.zip.tmp, which replaces outputs.zip (os.replace) after
+    `max_files` input files or `max_bytes` of members and at close_all(); a
+    killed run leaves the last complete outputs.zip untouched. The on_flushed
+    callback of each write is queued once its archive is replaced, so a file
+    is logged as done only when its members are readable from disk;
+    take_flushed() hands them to the caller's thread.
+    """
+
+    def __init__(self, max_files: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._open = {}   # dirpath -> [ZipFile, files, bytes, on_flushed callbacks]
+        self._flushed = []
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, dirpath: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(dirpath, threading.Lock())
+
+    def _close(self, dirpath: str) -> None:
+        # Caller holds the folder lock
+        entry = self._open.pop(dirpath, None)
+        if entry is None:
+            return
+        entry[0].close()
+        zip_path = os.path.join(dirpath, ZIP_NAME)
+        os.replace(zip_path + ".tmp", zip_path)
+        with self._guard:
+            self._flushed.extend(entry[3])
+
+    def take_flushed(self) -> list:
+        """on_flushed callbacks of the archives replaced since the last call."""
+        with self._guard:
+            flushed, self._flushed = self._flushed, []
+        return flushed
+
+    def members(self, dirpath: str) -> set:
+        zip_path = os.path.join(dirpath, ZIP_NAME)
+        with self._lock(dirpath):
+            if dirpath in self._open:
+                return set(self._open[dirpath][0].namelist())
+            if not os.path.exists(zip_path):
+                return set()
+            with zipfile.ZipFile(zip_path) as zf:
+                return set(zf.namelist())
+
+    def write(self, dirpath: str, members: dict, on_flushed) -> None:
+        """Add {name: bytes} for one input file; on_flushed is queued once the archive is replaced."""
+        with self._lock(dirpath):
+            entry = self._open.get(dirpath)
+            if entry is None:
+                zip_path = os.path.join(dirpath, ZIP_NAME)
+                if os.path.exists(zip_path):
+                    shutil.copyfile(zip_path, zip_path + ".tmp")
+                elif os.path.exists(zip_path + ".tmp"):
+                    os.remove(zip_path + ".tmp")  # left by a killed run
+                zf = zipfile.ZipFile(zip_path + ".tmp", "a", zipfile.ZIP_STORED, allowZip64=True)
+                entry = self._open[dirpath] = [zf, 0, 0, []]
+            for name, data in members.items():
+                entry[0].writestr(name, data)
+                entry[2] += len(data)
+            entry[1] += 1
+            entry[3].append(on_flushed)
+            if entry[1] >= self.max_files or entry[2] >= self.max_bytes:
+                self._close(dirpath)
+
+    def read(self, dirpath: str, name: str) -> bytes:
+        with self._lock(dirpath):
+            # Flush first if the archive is open for writing
+            self._close(dirpath)
+            with zipfile.ZipFile(os.path.join(dirpath, ZIP_NAME)) as zf:
+                return zf.read(name)
+
+    def close_all(self) -> None:
+        for dirpath in list(self._open):
+            with self._lock(dirpath):
+                self._close(dirpath)
+
+
+def iter_audio(root: str, exts_lower: tuple):
+    """
+    Yield (dirpath, filename, names) for audio files under root.
+    `names` is the set of file names in dirpath, read once by os.scandir, so
+    checking for sibling outputs needs no further stat() calls.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(exts_lower) and entry.is_file():
+                yield current, entry.name, names
+        stack.extend(reversed(subdirs))
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0  # vanished since the walk: it fails (and is logged) when decoded
+
+
+def pcm_cache_path(audio_path: str) -> str:
+    dirpath, filename = os.path.split(audio_path)
+    return os.path.join(dirpath, "." + os.path.splitext(filename)[0] + ".pcm.npz")
+
+
+def load_audio_cached(path: str) -> np.ndarray:
+    """
+    Decoded 16 kHz audio for `path`, cached as float16 in a hidden .npz next to it.
+    The cache is keyed by file size + mtime, so an edited file is decoded again.
+    """
+    st = os.stat(path)
+    key = f"{st.st_size}-{st.st_mtime_ns}"
+    cache_path = pcm_cache_path(path)
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached["key"]) == key:
+                    return cached["audio"].astype(np.float32)
+        except Exception:
+            pass  # unreadable cache: decode again
+    audio = decode_audio(path, sampling_rate=16000)
+    np.savez(cache_path, key=np.array(key), audio=audio.astype(np.float16))
+    return audio
+
+
+def speech_clips(audio: np.ndarray) -> list:
+    """
+    Silero VAD (bundled with faster-whisper) over 16 kHz audio: speech regions of
+    at most 30 s, as [{"start": s, "end": e}] in seconds. Empty means silent.
+    Same VAD options as BatchedInferencePipeline uses internally, so every clip
+    fits one model window.
+    """
+    vad_options = VadOptions(max_speech_duration_s=30, min_silence_duration_ms=160)
+    return [{"start": c["start"] / 16000, "end": c["end"] / 16000}
+            for c in get_speech_timestamps(audio, vad_options)]
+
+
 def human_time() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -143,49 +435,92 @@ def ensure_ffmpeg(ffmpeg_path: str | None):
     # Nếu truyền --ffmpeg và file tồn tại: thêm vào PATH tạm thời cho tiến trình này
     if ffmpeg_path and os.path.isfile(ffmpeg_path):
         os.environ["PATH"] = os.pathsep.join([os.path.dirname(ffmpeg_path), os.environ.get("PATH", "")])
-    # Kiểm tra lại
+    # Kiểm tra lại. Audio is decoded in-process by PyAV (faster_whisper.decode_audio),
+    # so the ffmpeg binary is optional; it is only put on PATH for other tools.
     if not shutil.which("ffmpeg"):
-        raise RuntimeError(
-            "FFmpeg not found. Install FFmpeg or pass --ffmpeg <path-to-ffmpeg.exe> "
-            "E.g. --ffmpeg .\\apps\\ffmpeg\\bin\\ffmpeg.exe"
-        )
+        print("ℹ️  FFmpeg binary not found; decoding in-process with PyAV.")
 
 # =========================
 # Core
 # =========================
+def load_asr(model_name: str, device: str, compute_type: str | None = None, gpus: list | None = None,
+             flash_attention: bool = False) -> tuple:
+    """Load the model once; returns (pipeline, num_workers, batch_size) for transcribe_folder()."""
+    # Load Whisper model (CTranslate2 int8 kernels on CPU, fp16 on GPU unless --compute_type says otherwise)
+    compute_type = compute_type or ("int8" if device == "cpu" else "float16")
+    batch_size = int(os.environ.get("BATCH_SIZE") or (4 if device == "cpu" else 16))
+    print(f"🎙️  Loading Whisper model: {model_name} (device={device}, compute_type={compute_type}, batch_size={batch_size})")
+    model_kwargs = {}
+    if flash_attention:
+        if device == "cuda":
+            # CTranslate2's fused FlashAttention kernels (Ampere or newer GPUs)
+            model_kwargs["flash_attention"] = True
+            print("⚡ Flash attention: on")
+        else:
+            print("ℹ️  --flash_attention only applies on CUDA; ignored on CPU.")
+    if device == "cuda" and gpus:
+        # device_index loads one replica per listed GPU and CTranslate2 hands each concurrent
+        # call to a free one; num_workers would multiply that (replicas per device), so it
+        # stays 1 and len(gpus) only sizes the concurrency of the pipeline below
+        num_workers = len(gpus)
+        print(f"🖥️  GPUs: {gpus}")
+        model = WhisperModel(model_name, device=device, device_index=gpus,
+                             num_workers=1, compute_type=compute_type, **model_kwargs)
+    else:
+        num_workers = 1
+        model = WhisperModel(model_name, device=device, compute_type=compute_type, **model_kwargs)
+    pipeline = BatchedInferencePipeline(model)
+
+    # PDF font (registered at import)
+    if PDF_FONT == "Helvetica":
+        print("ℹ️  Arial not found. Using built-in 'Helvetica' for PDF.")
+    else:
+        print("✅ Registered PDF font:", PDF_FONT)
+
+    return pipeline, num_workers, batch_size
+
+
 def transcribe_folder(
     root_folder: str,
     model_name: str,
     language: str,
     exts: list,
     device: str,
-    log_success: str,
-    log_error: str,
-    processed_list: str,
-) -> None:
+    events_log: str,
+    pcm_cache: bool = False,
+    purge_pcm: bool = False,
+    compute_type: str | None = None,
+    gpus: list | None = None,
+    asr: tuple | None = None,
+    flash_attention: bool = False,
+    pack_zip: bool = False,
+    decode_options: dict | None = None,
+    skip_silent: bool = True,
+    legacy_processed: str | None = None,
+) -> dict:
+    """
+    Transcribe every audio file under root_folder (or the single file it names).
+    `asr` is a preloaded (pipeline, num_workers, batch_size) from load_asr(); when
+    omitted the model is loaded here. Returns the run summary counts and errors.
+    """
     # Normalize
     root_folder = os.path.abspath(root_folder)
-    log_success_abs = os.path.abspath(log_success)
-    log_error_abs = os.path.abspath(log_error)
-    processed_list_abs = os.path.abspath(processed_list)
+    events_abs = os.path.abspath(events_log)
+    exts_lower = tuple(e.lower() for e in exts)
 
     # Ensure log folder exists
-    for path in [log_success_abs, log_error_abs, processed_list_abs]:
-        ensure_parent_dir(path)
+    ensure_parent_dir(events_abs)
 
-    # Load processed set
-    processed = load_processed_set(processed_list_abs)
+    # First run after the switch from the three text logs: carry the old processed list over
+    if legacy_processed:
+        imported = import_legacy_processed(events_abs, os.path.abspath(legacy_processed))
+        if imported:
+            print(f"ℹ️  Imported {imported} processed paths from {legacy_processed} into {events_log}")
 
-    # Load Whisper model
-    print(f"🎙️  Loading Whisper model: {model_name} (device={device})")
-    model = whisper.load_model(model_name, device=device)
+    # Load processed set
+    processed = load_processed_set(events_abs)
 
-    # Register PDF font
-    font_name = register_pdf_font()
-    if font_name == "Helvetica":
-        print("ℹ️  Arial not found. Using built-in 'Helvetica' for PDF.")
-    else:
-        print("✅ Registered PDF font:", font_name)
+    pipeline, num_workers, batch_size = asr or load_asr(model_name, device, compute_type, gpus, flash_attention)
 
     # Walk files
     total = 0
@@ -193,66 +528,198 @@ def transcribe_folder(
     skipped_existing = 0
     succeeded = 0
     failed = 0
-
-    print(f"📁 Root: {root_folder}")
-    for dirpath, _, filenames in os.walk(root_folder):
-        for filename in filenames:
-            if not any(filename.lower().endswith(ext.lower()) for ext in exts):
-                continue
-
-            total += 1
-            full_path = os.path.abspath(os.path.join(dirpath, filename))
-            base_name, _ = os.path.splitext(filename)
-
-            # Skip if already processed before
-            if full_path in processed:
-                print(f"[SKIP • processed] {filename}")
-                skipped_processed += 1
-                continue
-
-            # Expected outputs
-            txt_path = os.path.join(dirpath, base_name + ".txt")
-            docx_path = os.path.join(dirpath, base_name + ".docx")
-            pdf_path = os.path.join(dirpath, base_name + ".pdf")
-
-            # Skip if outputs already exist
-            if all(os.path.exists(p) for p in [txt_path, docx_path, pdf_path]):
-                print(f"[SKIP • existing outputs] {filename}")
-                # Mark as processed to avoid rework next time
-                safe_log_append(processed_list_abs, full_path)
-                processed.add(full_path)
-                skipped_existing += 1
-                continue
-
-            # Transcribe
+    errors = []
+
+    # One JSONL events log, open for the whole run as an O_APPEND descriptor: each
+    # event is one write() that lands whole at the end of the file, with no buffer
+    # to flush. Only the event loop thread writes to it.
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    events_fd = os.open(events_abs, flags, 0o644)
+
+    def log_event(full_path, status, **fields):
+        event = {"ts": human_time(), "path": full_path, "status": status, **fields}
+        os.write(events_fd, (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    decode_options = dict(decode_options or {})
+    sequential = decode_options.pop("sequential", False)
+    if sequential:
+        print("ℹ️  Sequential decoding (fallback / conditioning options requested): chunks are not batched")
+
+    def transcribe_one(audio, clips=None):
+        """
+        Run one decoded file through the pipeline; returns (text, start time).
+        `clips` are the pre-pass speech regions, passed on so VAD is not run twice.
+        """
+        start = time.time()
+        # language hint (e.g., "vi") can speed up or improve quality for target language
+        if sequential:
+            if clips:
+                # WhisperModel takes clip bounds as a flat start,end,... list in seconds
+                bounds = [t for c in clips for t in (c["start"], c["end"])]
+                segments, _ = pipeline.model.transcribe(
+                    audio, language=language, clip_timestamps=bounds, **decode_options)
+            else:
+                segments, _ = pipeline.model.transcribe(audio, language=language, vad_filter=True, **decode_options)
+        else:
+            segments, _ = pipeline.transcribe(audio, batch_size=batch_size, language=language,
+                                              clip_timestamps=clips, **decode_options)
+        # The generator is drained here, so outputs are saved only once every chunk of this file is back
+        return " ".join(s.text.strip() for s in segments).strip(), start
+
+    savers = {".txt": save_txt, ".docx": save_docx, ".pdf": save_pdf}
+    zips = ZipOutputs()
+
+    def read_txt(dirpath, name):
+        path = os.path.join(dirpath, name)
+        if os.path.exists(path):
+            return load_txt(path)
+        return zips.read(dirpath, name).decode("utf-8")
+
+    def mark_done(full_path, silent, duration):
+        """Log a file as processed; with --pack-zip, called once its archive is replaced."""
+        log_event(full_path, "silent" if silent else "ok", dur=round(duration, 2))
+        processed.add(full_path)
+        if purge_pcm:
             try:
-                print(f"\n🔄 [RUNNING] {filename}")
-                print(f"⏱️  Start time: {human_time()}")
+                os.remove(pcm_cache_path(full_path))
+            except FileNotFoundError:
+                pass
+
+    async def process(loop, sems, pools, dirpath, filename, names):
+        """Decode -> transcribe -> write TXT/DOCX/PDF for one file; returns True on success."""
+        decode_sem, gpu_sem = sems
+        io_pool, gpu_pool = pools
+        full_path = os.path.join(dirpath, filename)
+        base_name, _ = os.path.splitext(filename)
+        silent = False
+        try:
+            if base_name + ".txt" in names:
+                # Transcript already on disk: only DOCX and/or PDF are missing, rebuild them from it
+                missing = [ext for ext in (".docx", ".pdf") if base_name + ext not in names]
                 start = time.time()
-
-                # language hint (e.g., "vi") can speed up or improve quality for target language
-                result = model.transcribe(full_path, language=language)
-                text = (result.get("text") or "").strip()
-
-                # Save outputs
-                save_txt(text, txt_path)
-                save_docx(text, docx_path)
-                save_pdf(text, pdf_path, font_name=font_name)
-
+                text = await loop.run_in_executor(io_pool, read_txt, dirpath, base_name + ".txt")
+                print(f"♻️  [REBUILD {' '.join(missing)}] {filename} from existing TXT")
+            else:
+                missing = list(savers)
+                # decode_sem bounds how many decoded files sit in memory waiting for a model worker
+                async with decode_sem:
+                    audio = await loop.run_in_executor(
+                        io_pool, load_audio_cached if pcm_cache else decode_audio, full_path)
+                    start = time.time()
+                    # VAD pre-pass off the model workers: a file with no speech never takes a model slot,
+                    # and the speech clips it finds replace the pipeline's own VAD run
+                    clips = await loop.run_in_executor(io_pool, speech_clips, audio) if skip_silent else None
+                    silent = clips == []
+                    if silent:
+                        text = ""
+                        print(f"[SKIP-SILENT] {filename}: no speech detected, writing empty outputs")
+                    else:
+                        async with gpu_sem:
+                            print(f"\n🔄 [RUNNING] {filename}")
+                            print(f"⏱️  Start time: {human_time()}")
+                            text, start = await loop.run_in_executor(gpu_pool, transcribe_one, audio, clips)
+                del audio
+                if not silent:
+                    print(f"📝 Transcribed {filename} in {time.time() - start:.2f} seconds, writing outputs...")
+
+            # Save outputs; the file counts as processed only once all of them are on disk
+            if pack_zip:
+                rendered = await asyncio.gather(*(
+                    loop.run_in_executor(io_pool, render_output, ext, text) for ext in missing
+                ))
+                members = {base_name + ext: data for ext, data in zip(missing, rendered)}
                 duration = time.time() - start
-                print(f"✅ [DONE] {filename} in {duration:.2f} seconds")
-                print(f"🕒 End time: {human_time()}\n")
-
-                # Logs
-                safe_log_append(log_success_abs, f"{datetime.now()} | SUCCESS | {full_path} | {duration:.2f} sec")
-                safe_log_append(processed_list_abs, full_path)
-                processed.add(full_path)
-                succeeded += 1
-            except Exception as e:
-                err = f"{datetime.now()} | ERROR | {full_path} | {str(e)}"
-                safe_log_append(log_error_abs, err)
-                print(f"❌ [ERROR] {filename}: {e}")
-                failed += 1
+                done = functools.partial(mark_done, full_path, silent, duration)
+                await loop.run_in_executor(io_pool, zips.write, dirpath, members, done)
+                # Log whatever the write flushed here, on the event loop thread
+                for on_flushed in zips.take_flushed():
+                    on_flushed()
+            else:
+                await asyncio.gather(*(
+                    loop.run_in_executor(io_pool, savers[ext], text, os.path.join(dirpath, base_name + ext))
+                    for ext in missing
+                ))
+                duration = time.time() - start
+                mark_done(full_path, silent, duration)
+            names.update(base_name + ext for ext in missing)
+        except Exception as e:
+            log_event(full_path, "error", error=str(e))
+            print(f"❌ [ERROR] {filename}: {e}")
+            errors.append((full_path, str(e)))
+            return False
+
+        print(f"✅ [DONE] {filename} in {duration:.2f} seconds")
+        return True
+
+    async def run_all():
+        nonlocal total, skipped_processed, skipped_existing, succeeded, failed
+        loop = asyncio.get_running_loop()
+        # One in-flight transcribe per model worker; decoding and writing overlap with it
+        sems = (asyncio.Semaphore(num_workers + 1), asyncio.Semaphore(num_workers))
+        with ThreadPoolExecutor(max_workers=4) as io_pool, \
+                ThreadPoolExecutor(max_workers=num_workers) as gpu_pool:
+            if os.path.isfile(root_folder):
+                dirpath, filename = os.path.split(root_folder)
+                candidates = [(dirpath, filename, set(os.listdir(dirpath)))]
+            else:
+                candidates = await loop.run_in_executor(io_pool, lambda: list(iter_audio(root_folder, exts_lower)))
+            if pack_zip:
+                # Archive members count as existing outputs, alongside any loose files
+                packed = {}
+                for dirpath, _, names in candidates:
+                    if dirpath not in packed:
+                        packed[dirpath] = names | zips.members(dirpath)
+                candidates = [(dirpath, filename, packed[dirpath]) for dirpath, filename, _ in candidates]
+
+            todo = []
+            for dirpath, filename, names in candidates:
+                total += 1
+                full_path = os.path.join(dirpath, filename)
+                base_name, _ = os.path.splitext(filename)
+
+                # Skip if already processed before
+                if full_path in processed:
+                    print(f"[SKIP • processed] {filename}")
+                    skipped_processed += 1
+                    continue
+
+                # Skip if outputs already exist
+                if {base_name + ".txt", base_name + ".docx", base_name + ".pdf"} <= names:
+                    print(f"[SKIP • existing outputs] {filename}")
+                    # Mark as processed to avoid rework next time
+                    log_event(full_path, "skip")
+                    processed.add(full_path)
+                    skipped_existing += 1
+                    continue
+
+                todo.append((dirpath, filename, names))
+
+            # Largest first (longest-processing-time order): long recordings start early
+            # and short ones fill the model workers at the end instead of a long tail.
+            # Only files that survived the skip checks are stat()ed.
+            sizes = await loop.run_in_executor(
+                io_pool, lambda: [file_size(os.path.join(d, f)) for d, f, _ in todo])
+            order = sorted(range(len(todo)), key=sizes.__getitem__, reverse=True)
+            tasks = [asyncio.ensure_future(process(loop, sems, (io_pool, gpu_pool), *todo[i])) for i in order]
+
+            for done in asyncio.as_completed(tasks):
+                if await done:
+                    succeeded += 1
+                    if succeeded % 1000 == 0:
+                        save_processed_cache(events_abs, processed)
+                else:
+                    failed += 1
+
+    print(f"📁 Root: {root_folder}")
+    try:
+        asyncio.run(run_all())
+    finally:
+        # Write the central directory of every archive still open, then log its files
+        zips.close_all()
+        for on_flushed in zips.take_flushed():
+            on_flushed()
+        os.close(events_fd)
+        save_processed_cache(events_abs, processed)
 
     print("\n===== SUMMARY =====")
     print(f"Total audio files found: {total}")
@@ -261,6 +728,58 @@ def transcribe_folder(
     print(f"Succeeded:               {succeeded}")
     print(f"Failed:                  {failed}")
     print("====================")
+    return {
+        "total": total,
+        "skipped_processed": skipped_processed,
+        "skipped_existing": skipped_existing,
+        "succeeded": succeeded,
+        "failed": failed,
+        "errors": errors,
+    }
+
+
+# =========================
+# Server mode (--serve)
+# =========================
+class _PathHandler(socketserver.StreamRequestHandler):
+    """One path per line in; one 'OK' or 'ERR <reason>' line out per path."""
+
+    def handle(self) -> None:
+        for raw in self.rfile:
+            path = raw.decode("utf-8").strip()
+            if not path:
+                continue
+            try:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"No such file or folder: {path}")
+                summary = transcribe_folder(root_folder=path, asr=self.server.asr, **self.server.job)
+                if summary["errors"]:
+                    failed_path, reason = summary["errors"][0]
+                    reply = f"ERR {summary['failed']} failed, first: {failed_path}: {reason}"
+                else:
+                    reply = "OK"
+            except Exception as e:
+                reply = f"ERR {e}"
+            try:
+                self.wfile.write((" ".join(reply.splitlines()) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+def serve(address: str, asr: tuple, job: dict) -> None:
+    """Keep the loaded model and answer path requests until interrupted."""
+    server = bind_server(address, _PathHandler)
+    server.asr, server.job = asr, job
+
+    with server:
+        print(f"🟢 Serving on {address} (send one file or folder path per line)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            remove_socket_file(address)
 
 
 def parse_args() -> argparse.Namespace:
@@ -268,38 +787,130 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--root", type=str, default="../mp3-test",
                         help="Root folder to scan for audio files (default: ../mp3-test)")
     parser.add_argument("--model", type=str, default="large",
-                        help="Whisper model name (tiny|base|small|medium|large|large-v3...) (default: large)")
+                        help="Whisper model name (tiny|base|small|medium|large|large-v3...) "
+                             "or a CTranslate2 model folder (default: large)")
     parser.add_argument("--lang", type=str, default="vi",
                         help="Language hint (e.g., vi, en) (default: vi)")
     parser.add_argument("--ext", type=str, default=".mp3",
                         help="Comma-separated list of extensions (e.g., .mp3,.m4a,.wav) (default: .mp3)")
-    parser.add_argument("--device", type=str, default="cpu",
-                        help="Device for inference (cpu or cuda) (default: cpu)")
-    parser.add_argument("--log_success", type=str, default="log/log_success.txt",
-                        help="Path to success log file (default: log/log_success.txt)")
-    parser.add_argument("--log_error", type=str, default="log/log_error.txt",
-                        help="Path to error log file (default: log/log_error.txt)")
+    parser.add_argument("--device", type=str, default="auto", choices=["auto", "cpu", "cuda"],
+                        help="Device for inference; auto picks cuda when a GPU is visible (default: auto)")
+    parser.add_argument("--compute_type", type=str, default=None,
+                        choices=["int8", "int8_float16", "float16", "float32"],
+                        help="CTranslate2 compute type (default: int8 on CPU, float16 on CUDA)")
+    parser.add_argument("--flash_attention", action="store_true",
+                        help="Use CTranslate2's fused flash-attention kernels (CUDA, Ampere or newer GPU)")
+    parser.add_argument("--gpus", type=str, default="",
+                        help='Comma-separated CUDA device indices to run on in parallel, e.g. "0,1" (default: GPU 0 only)')
+    parser.add_argument("--events", type=str, default="log/events.jsonl",
+                        help="JSONL events log; also the processed list (default: log/events.jsonl). "
+                             "logtools.py rebuilds the old success/error/processed text files from it")
+    # Text logs of older versions, kept so existing command lines still run
     parser.add_argument("--processed_list", type=str, default="log/processed_files.txt",
-                        help="Path to processed list file (default: log/processed_files.txt)")
+                        help="Deprecated: old processed list, imported into --events when that "
+                             "does not exist yet (default: log/processed_files.txt)")
+    parser.add_argument("--log_success", type=str, default=None,
+                        help="Deprecated and ignored: successes are events in --events")
+    parser.add_argument("--log_error", type=str, default=None,
+                        help="Deprecated and ignored: errors are events in --events")
+    # Decoding. By default chunks go through the batched pipeline, which decodes each chunk
+    # once at a single temperature with no conditioning on previous text. The options
+    # marked "sequential" are only implemented by WhisperModel.transcribe(); giving any
+    # of them switches the run to that (slower, one window at a time) path.
+    parser.add_argument("--fast", action="store_true",
+                        help="Greedy batched decoding (beam_size=1, temperature 0); ignores the sequential options")
+    parser.add_argument("--beam_size", type=int, default=5, help="Beam size (default: 5)")
+    parser.add_argument("--temperature", type=str, default="0.0",
+                        help="Decoding temperature (default: 0.0). A comma-separated fallback schedule, "
+                             "e.g. 0.0,0.2,0.4,0.6,0.8,1.0, is sequential")
+    parser.add_argument("--best_of", type=int, default=None,
+                        help="Candidates sampled at fallback temperatures > 0 (sequential)")
+    parser.add_argument("--condition_on_previous_text", action="store_true",
+                        help="Feed the previous window's text as prompt (sequential)")
+    parser.add_argument("--no_speech_threshold", type=float, default=None,
+                        help="Treat a window as silence above this no-speech probability (sequential)")
+    parser.add_argument("--compression_ratio_threshold", type=float, default=None,
+                        help="Retry at the next fallback temperature above this gzip ratio (sequential)")
+    parser.add_argument("--without_timestamps", action=argparse.BooleanOptionalAction, default=True,
+                        help="Skip timestamp tokens while decoding (default: on)")
+    parser.add_argument("--skip_silent", action=argparse.BooleanOptionalAction, default=True,
+                        help="VAD pre-pass: files without any speech get empty outputs and a SKIP-SILENT "
+                             "event instead of a transcription, and the speech regions found are "
+                             "decoded without a second VAD pass (default: on)")
+    parser.add_argument("--pcm_cache", action="store_true",
+                        help="Cache decoded 16 kHz audio in a hidden .<name>.pcm.npz next to each file")
+    parser.add_argument("--purge_pcm", action="store_true",
+                        help="Delete the PCM cache of a file once its TXT/DOCX/PDF are written")
+    parser.add_argument("--pack-zip", dest="pack_zip", action="store_true",
+                        help="Write each folder's TXT/DOCX/PDF into one uncompressed outputs.zip "
+                             "instead of three loose files per audio file")
+    parser.add_argument("--serve", type=str, default="", metavar="SOCKET",
+                        help="Keep the model loaded and transcribe paths sent by transcribe_mp3_client.py; "
+                             "SOCKET is a Unix socket path or host:port (--root is ignored)")
     parser.add_argument("--ffmpeg", type=str, default="", help="Path to ffmpeg.exe (optional)")
 
     return parser.parse_args()
 
 
+def decode_options_from_args(args: argparse.Namespace) -> dict:
+    """
+    faster-whisper transcribe() keyword arguments from the decoding flags.
+    `sequential` is set when an option the batched pipeline ignores was given.
+    """
+    if args.fast:
+        return dict(beam_size=1, temperature=0.0, without_timestamps=True)
+    temperatures = [float(t) for t in args.temperature.split(",") if t.strip()]
+    options = dict(
+        beam_size=args.beam_size,
+        temperature=temperatures[0] if len(temperatures) == 1 else temperatures,
+        without_timestamps=args.without_timestamps,
+    )
+    sequential = dict(
+        best_of=args.best_of,
+        no_speech_threshold=args.no_speech_threshold,
+        compression_ratio_threshold=args.compression_ratio_threshold,
+    )
+    if len(temperatures) > 1 or args.condition_on_previous_text or any(v is not None for v in sequential.values()):
+        options.update((k, v) for k, v in sequential.items() if v is not None)
+        options["condition_on_previous_text"] = args.condition_on_previous_text
+        options["sequential"] = True
+    return options
+
+
 def main():
     args = parse_args()
     exts = [e.strip() for e in args.ext.split(",") if e.strip()]
     ensure_ffmpeg(args.ffmpeg or None)
-    transcribe_folder(
-        root_folder=args.root,
+    if args.device == "auto":
+        args.device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    gpus = [int(g) for g in args.gpus.split(",") if g.strip()]
+    if args.log_success or args.log_error:
+        print("⚠️  --log_success/--log_error are deprecated and ignored; everything goes to "
+              f"{args.events} (python logtools.py {args.events} rebuilds the text logs)")
+    job = dict(
         model_name=args.model,
         language=args.lang,
         exts=exts,
         device=args.device,
-        log_success=args.log_success,
-        log_error=args.log_error,
-        processed_list=args.processed_list,
+        events_log=args.events,
+        pcm_cache=args.pcm_cache,
+        purge_pcm=args.purge_pcm,
+        pack_zip=args.pack_zip,
+        decode_options=decode_options_from_args(args),
+        skip_silent=args.skip_silent,
+        legacy_processed=args.processed_list,
     )
+    if args.serve:
+        asr = load_asr(args.model, args.device, args.compute_type, gpus, args.flash_attention)
+        try:
+            serve(args.serve, asr, job)
+        except (RuntimeError, OSError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    transcribe_folder(root_folder=args.root, compute_type=args.compute_type, gpus=gpus,
+                      flash_attention=args.flash_attention, **job)
 
 
 if __name__ == "__main__":